@@ -0,0 +1,121 @@
+import config
+
+class Metric:
+    """One report column computed from a stream of events with a small fixed-size state per key
+
+    Subclasses set `name` and `title`, and implement add(); start() and
+    result() default to counting.
+    """
+
+    name = None
+    title = None
+
+    def start(self):
+        return 0
+
+    def add(self, value, event):
+        raise NotImplementedError
+
+    def result(self, value):
+        return value
+
+class Pushes(Metric):
+    name = "pushes"
+    title = "Pushes"
+
+    def add(self, value, event):
+        return value + 1 if event.action_name.startswith("pushed") else value
+
+class Commits(Metric):
+    name = "commits"
+    title = "Commits"
+
+    def add(self, value, event):
+        return value + (event.commit_count or 0) if event.action_name.startswith("pushed") else value
+
+class MergeRequestsOpened(Metric):
+    name = "mrs_opened"
+    title = "MRs Opened"
+
+    def add(self, value, event):
+        return value + 1 if event.action_name == "opened" and event.target_type == "MergeRequest" else value
+
+class MergeRequestsMerged(Metric):
+    name = "mrs_merged"
+    title = "MRs Merged"
+
+    def add(self, value, event):
+        return value + 1 if event.action_name == "accepted" and event.target_type == "MergeRequest" else value
+
+class Comments(Metric):
+    name = "comments"
+    title = "Comments"
+
+    def add(self, value, event):
+        return value + 1 if event.action_name == "commented on" else value
+
+class ActiveDays(Metric):
+    """Distinct UTC days with any activity; the state never outgrows the report window"""
+
+    name = "active_days"
+    title = "Active Days"
+
+    def start(self):
+        return set()
+
+    def add(self, value, event):
+        value.add(event.created_at[:10])
+        return value
+
+    def result(self, value):
+        return len(value)
+
+METRICS = {metric.name: metric for metric in (
+    Pushes, Commits, MergeRequestsOpened, MergeRequestsMerged, Comments, ActiveDays,
+)}
+
+# Extra report columns, in order; [] keeps the report to the latest activity only
+REPORT_METRICS = getattr(config, "REPORT_METRICS", list(METRICS))
+
+class ActivityAggregator:
+    """Updates every registered metric per (project, author) in one pass as events stream by"""
+
+    def __init__(self, names=None):
+        names = REPORT_METRICS if names is None else names
+        unknown = [name for name in names if name not in METRICS]
+        if unknown:
+            raise ValueError(f"Unknown report metric(s): {', '.join(unknown)}")
+        self.metrics = [METRICS[name]() for name in names]
+        self.state = {}
+
+    def add(self, event):
+        key = (event.project_id, event.author_id)
+        values = self.state.get(key)
+        if values is None:
+            values = self.state[key] = [metric.start() for metric in self.metrics]
+        for index, metric in enumerate(self.metrics):
+            values[index] = metric.add(values[index], event)
+
+    def observe(self, events):
+        """Pass events through unchanged, adding each one on the way"""
+        for event in events:
+            self.add(event)
+            yield event
+
+    def by_project(self):
+        """Return {project_id: {author_id: [metric values]}}"""
+        results = {}
+        for (project_id, author_id), values in self.state.items():
+            results.setdefault(project_id, {})[author_id] = [
+                metric.result(value) for metric, value in zip(self.metrics, values)
+            ]
+        return results
+
+def metric_titles(names=None):
+    """Report column titles of the configured metrics"""
+    return [METRICS[name].title for name in (REPORT_METRICS if names is None else names)]
+
+def empty_values(names=None):
+    """Metric values for a member with no events"""
+    return [metric.result(metric.start()) for metric in
+            (METRICS[name]() for name in (REPORT_METRICS if names is None else names))]
@@ -0,0 +1,144 @@
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta, timezone
+import config
+from gitlab_api import Event
+
+STORE_PATH = getattr(config, "ACTIVITY_STORE_PATH", "cache/activity.sqlite3")
+
+INSERT_EVENT = (
+    "INSERT OR IGNORE INTO events "
+    "(id, project_id, author_id, action_name, created_at, target_type, commit_count) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+
+def _first_day_after(after_date):
+    """GitLab's `after` is exclusive, so the window starts on the following day"""
+    return (date.fromisoformat(after_date) + timedelta(days=1)).isoformat()
+
+def utc_now():
+    """Current time formatted like GitLab's created_at, so it compares as a string"""
+    now = datetime.now(timezone.utc)
+    return f"{now:%Y-%m-%dT%H:%M:%S}.{now.microsecond // 1000:03d}Z"
+
+class ActivityStore:
+    """Local copy of each project's recent events plus a per-project high-water mark"""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        # Sharded crawls write from several processes; wait out their locks
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.executescript(
+            """
+            -- Only the fields the report reads are kept. Events delivered by
+            -- webhooks have negative IDs until a poll replaces them.
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY,
+                project_id INTEGER NOT NULL,
+                author_id INTEGER NOT NULL,
+                action_name TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                target_type TEXT,
+                commit_count INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS events_project_created
+                ON events (project_id, created_at);
+            CREATE TABLE IF NOT EXISTS watermarks (
+                project_id INTEGER PRIMARY KEY,
+                window_start TEXT NOT NULL,
+                last_created_at TEXT,
+                synced_at TEXT
+            );
+            """
+        )
+        # Stores created before webhook ingestion lack the poll time
+        columns = [row[1] for row in self.db.execute("PRAGMA table_info(watermarks)")]
+        if "synced_at" not in columns:
+            self.db.execute("ALTER TABLE watermarks ADD COLUMN synced_at TEXT")
+        # Stores created before the report metrics lack their fields; drop the old events
+        # (INSERT OR IGNORE would keep them without the new fields) and refetch the window once
+        columns = [row[1] for row in self.db.execute("PRAGMA table_info(events)")]
+        if "commit_count" not in columns:
+            self.db.execute("ALTER TABLE events ADD COLUMN target_type TEXT")
+            self.db.execute("ALTER TABLE events ADD COLUMN commit_count INTEGER NOT NULL DEFAULT 0")
+            self.db.execute("DELETE FROM events")
+            self.db.execute("DELETE FROM watermarks")
+        self.db.commit()
+
+    def get_watermark(self, project_id):
+        """Return {"window_start", "last_created_at", "synced_at"} for a project, or None if never synced"""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT window_start, last_created_at, synced_at FROM watermarks WHERE project_id = ?",
+                (project_id,),
+            ).fetchone()
+        return {"window_start": row[0], "last_created_at": row[1], "synced_at": row[2]} if row else None
+
+    def merge(self, project_id, events, after_date, synced_at=None):
+        """Add newly fetched events, advance the high-water mark and drop events outside the window
+
+        `synced_at` is when the poll started: webhook events before it are
+        covered by the polled ones and are dropped in their favour.
+        """
+        synced_at = synced_at or utc_now()
+        rows = [
+            (e.id, project_id, e.author_id, e.action_name, e.created_at, e.target_type, e.commit_count)
+            for e in events
+        ]
+        with self.lock:
+            self.db.execute(
+                "DELETE FROM events WHERE project_id = ? AND id < 0 AND created_at < ?",
+                (project_id, synced_at),
+            )
+            self.db.executemany(INSERT_EVENT, rows)
+            self.db.execute(
+                "DELETE FROM events WHERE project_id = ? AND created_at < ?",
+                (project_id, _first_day_after(after_date)),
+            )
+            last_created_at = self.db.execute(
+                "SELECT MAX(created_at) FROM events WHERE project_id = ? AND id > 0", (project_id,)
+            ).fetchone()[0]
+            self.db.execute(
+                "INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?, ?)",
+                (project_id, after_date, last_created_at, synced_at),
+            )
+            self.db.commit()
+
+    def record(self, events):
+        """Insert events delivered by webhooks; the next poll of their project reconciles them"""
+        rows = [
+            (e.id, e.project_id, e.author_id, e.action_name, e.created_at, e.target_type, e.commit_count)
+            for e in events
+        ]
+        with self.lock:
+            self.db.executemany(INSERT_EVENT, rows)
+            self.db.commit()
+        return len(rows)
+
+    def iter_events(self, project_id, after_date):
+        """Yield the project's stored events after `after_date`, newest first like the API"""
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT project_id, author_id, action_name, created_at, id, target_type, commit_count "
+                "FROM events "
+                "WHERE project_id = ? AND created_at >= ? "
+                "ORDER BY created_at DESC, id DESC",
+                (project_id, _first_day_after(after_date)),
+            ).fetchall()
+        for row in rows:
+            yield Event(*row)
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """Return the process-wide activity store, opening it on first use"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ActivityStore(STORE_PATH)
+        return _store
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from mock_gitlab_server import MockGitLab, start_server
+
+def load_config():
+    """Use config.py when present, otherwise fall back to config.example.py"""
+    try:
+        import config
+    except ImportError:
+        here = os.path.dirname(os.path.abspath(__file__))
+        spec = importlib.util.spec_from_file_location("config", os.path.join(here, "config.example.py"))
+        config = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(config)
+        sys.modules["config"] = config
+    return config
+
+def point_monitor_at(base_url, projects, workdir):
+    """Aim the monitor modules at the mock server and keep their state inside `workdir`"""
+    import activity_store
+    import gitlab
+    import gitlab_api
+    import http_cache
+    import report_history
+
+    gitlab_api.API_URL = f"{base_url}/api/v4"
+    gitlab.PROJECTS = [{"name": p["name"], "id": p["id"]} for p in projects]
+    gitlab.MONITOR_GROUP = None
+    http_cache.CACHE_PATH = os.path.join(workdir, "http_cache.sqlite3")
+    activity_store.STORE_PATH = os.path.join(workdir, "activity.sqlite3")
+    report_history.HISTORY_PATH = os.path.join(workdir, "report_history.sqlite3")
+    return gitlab
+
+def run_once(gitlab, mock, verbose):
+    """Run generate_report() once and measure it"""
+    mock.reset_stats()
+    output = sys.stdout if verbose else io.StringIO()
+    tracemalloc.start()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        gitlab.generate_report()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "wall_seconds": elapsed,
+        "requests": mock.stats["requests"],
+        "bytes": mock.stats["bytes"],
+        "throttled": mock.stats["throttled"],
+        "not_modified": mock.stats["not_modified"],
+        "peak_python_mb": peak / 1024 / 1024,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+def main():
+    """Benchmark generate_report() against a local mock GitLab"""
+    parser = argparse.ArgumentParser(description="Benchmark the monitor against a local mock GitLab")
+    parser.add_argument("--projects", type=int, default=7)
+    parser.add_argument("--members", type=int, default=30)
+    parser.add_argument("--groups", type=int, default=1, help="groups the projects are spread over")
+    parser.add_argument("--events", type=int, default=500, help="events per project")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--processes", type=int, default=1, help="CRAWL_PROCESSES for the sharded crawl")
+    parser.add_argument("--runs", type=int, default=2, help="repeat runs show cache and incremental gains")
+    parser.add_argument("--verbose", action="store_true", help="show the monitor's own output")
+    args = parser.parse_args()
+
+    load_config()
+    mock = MockGitLab(args.projects, args.members, args.events, max_page_size=args.page_size,
+                      latency=args.latency, error_rate=args.error_rate, groups=args.groups)
+    server, base_url = start_server(mock)
+
+    print(f"🧪 Mock GitLab: {args.projects} projects × {args.members} members, "
+          f"{args.events} events/project, page size {args.page_size}, "
+          f"latency {args.latency * 1000:.0f} ms, 429 rate {args.error_rate:.0%}")
+    print(f"{'run':>4} {'wall s':>8} {'requests':>9} {'KB':>9} {'429s':>5} {'304s':>5} {'peak MB':>8} {'RSS MB':>7}")
+
+    previous_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            gitlab = point_monitor_at(base_url, mock.projects, workdir)
+            gitlab.CRAWL_PROCESSES = args.processes
+            for run in range(1, args.runs + 1):
+                result = run_once(gitlab, mock, args.verbose)
+                print(f"{run:>4} {result['wall_seconds']:>8.2f} {result['requests']:>9} "
+                      f"{result['bytes'] / 1024:>9.1f} {result['throttled']:>5} {result['not_modified']:>5} "
+                      f"{result['peak_python_mb']:>8.1f} {result['max_rss_mb']:>7.1f}")
+        finally:
+            os.chdir(previous_dir)
+            server.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -16,9 +16,121 @@ PROJECTS = [
     # Add more projects as needed
 ]
 
+# Crawl concurrency: worker threads, and the most requests allowed in flight per host
+CRAWL_WORKERS = 8
+MAX_IN_FLIGHT_PER_HOST = 8
+
+# HTTP client: keep-alive pool size per host, seconds to wait for a free pooled
+# connection, and (connect, read) timeouts in seconds
+HTTP_POOL_SIZE = 16
+HTTP_POOL_TIMEOUT = 30
+HTTP_CONNECT_TIMEOUT = 5
+HTTP_READ_TIMEOUT = 30
+
+# Rate limiting: requests per second and burst per host, and retry/backoff for 429s and 5xx
+REQUESTS_PER_SECOND = 20
+REQUEST_BURST = 20
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+# On-disk HTTP cache for member lists and project listings (ETag revalidation, LRU eviction)
+HTTP_CACHE_PATH = "cache/http_cache.sqlite3"
+HTTP_CACHE_MAX_MB = 64
+CACHE_TTLS = {"members": 3600, "projects": 86400}  # seconds served without revalidating
+
+# Incremental runs: keep recent events locally and only fetch what is new since the last run
+INCREMENTAL_FETCH = True
+ACTIVITY_STORE_PATH = "cache/activity.sqlite3"
+
+# Checkpoints of each run (finished projects and event page cursors) that
+# `--resume` picks up after a crash; None disables checkpointing
+CRAWL_JOURNAL_PATH = "cache/crawl_journal.sqlite3"
+
+# Time limits so the report goes out on time: fetching stops RUN_DEADLINE_MINUTES after
+# a run starts, and a project's events may take PROJECT_BUDGET_SECONDS. Members whose
+# activity wasn't fully read get an "Incomplete (reason)" row; None disables either.
+RUN_DEADLINE_MINUTES = None
+PROJECT_BUDGET_SECONDS = None
+
+# Group mode: monitor every project in this group (full path or ID) instead of PROJECTS
+MONITOR_GROUP = None  # e.g. "simplyfiitsupport"
+
+# Event fetching: "project" (one call per project), "user" (one call per member via
+# /users/:id/events; private profiles return nothing) or "auto" (whichever is fewer).
+# Only "project" sees every member's events, so the others are opt-in.
+FETCH_STRATEGY = "project"
+
+# Member lists: fetch each group's members once and only direct members per project,
+# instead of /members/all per project (which repeats the group's members every time).
+# None enables it with MONITOR_GROUP, whose listing already names each project's group;
+# with PROJECTS it would first look up every project's namespace.
+RESOLVE_MEMBERS_BY_GROUP = None
+
+# Worker processes for very large groups: projects are split into shards that are
+# fetched and parsed in parallel processes; 1 crawls everything in this process
+CRAWL_PROCESSES = 1
+
+# Report files written per run: any of "csv", "csv.gz", "jsonl", "parquet", "arrow"
+# (the last two need pyarrow). The first format is the one that gets emailed.
+REPORT_FORMATS = ["csv"]
+
+# Extra report columns per developer and project, counted from the same events in one
+# pass: "pushes", "commits", "mrs_opened", "mrs_merged", "comments", "active_days".
+# [] keeps the report to the latest activity only.
+REPORT_METRICS = ["pushes", "commits", "mrs_opened", "mrs_merged", "comments", "active_days"]
+
+# Filtered reports per recipient, cut from the same crawl and mailed alongside the full
+# report to TO_EMAIL. Each recipient gets the rows of the listed projects (names or IDs)
+# plus the rows of the listed GitLab usernames in any project.
+REPORT_RECIPIENTS = {
+    # "team-lead@domain.com": {"projects": ["tbml", "tbml-frontend"]},
+    # "manager@domain.com": {"projects": ["climate_sense_AI"], "users": ["some.username"]},
+}
+
+# Report history: every run is upserted into an indexed SQLite file queried by report_history.py
+REPORT_HISTORY = True
+REPORT_HISTORY_PATH = "report_history.sqlite3"
+
+# Instrumentation: one JSON line per API call, plus an optional Prometheus textfile per run
+METRICS_LOG_PATH = "logs/api_requests.jsonl"
+METRICS_PROMETHEUS_PATH = None  # e.g. "/var/lib/node_exporter/textfile/gitlab_monitor.prom"
+
+# Webhook ingestion: webhook_receiver.py stores push, merge request, note and issue
+# events as they happen and reports are built from that store; each project is still
+# polled every RECONCILE_HOURS to catch missed deliveries. Point the GitLab project
+# webhook at http://<host>:WEBHOOK_PORT/ with WEBHOOK_SECRET as its secret token.
+# The receiver only listens beyond loopback (e.g. WEBHOOK_HOST = "0.0.0.0") with a secret.
+# RECONCILE_HOURS should sit clearly below (or above) the run interval, never equal to it.
+WEBHOOK_INGEST = False
+RECONCILE_HOURS = 20
+WEBHOOK_HOST = "127.0.0.1"
+WEBHOOK_PORT = 8082
+WEBHOOK_SECRET = None
+
+# Service mode (monitor_service.py): emailed daily run, optional hourly refresh, and a
+# /health endpoint reporting the last run; set SERVICE_STATUS_PORT = None to disable it
+SERVICE_DAILY_AT = "20:00"
+SERVICE_HOURLY = False
+SERVICE_STATUS_HOST = "127.0.0.1"
+SERVICE_STATUS_PORT = 8081
+
 # Microsoft Graph Configuration for Email (Optional)
 GRAPH_TOKEN = os.environ.get('GRAPH_TOKEN', 'your-graph-token-here')
 
+# Graph batch sending (send_batch_graph) with an app registration: tokens come from the
+# client-credentials flow and are cached on disk until shortly before they expire.
+# The app needs the Mail.Send application permission for GRAPH_SENDER's mailbox.
+GRAPH_TENANT_ID = os.environ.get('GRAPH_TENANT_ID')
+GRAPH_CLIENT_ID = os.environ.get('GRAPH_CLIENT_ID')
+GRAPH_CLIENT_SECRET = os.environ.get('GRAPH_CLIENT_SECRET')
+GRAPH_SENDER = "your-sender@domain.com"
+GRAPH_TOKEN_CACHE_PATH = "cache/graph_token.json"
+GRAPH_UPLOAD_THRESHOLD_MB = 3  # larger attachments use upload sessions instead of inline base64
+# Endpoints; point both at mock_graph_server.py for local testing
+GRAPH_API_URL = "https://graph.microsoft.com/v1.0"
+GRAPH_AUTHORITY_URL = "https://login.microsoftonline.com"
+
 # Email Configuration (Update with your emails)
 FROM_EMAIL = "your-sender@domain.com"
 TO_EMAIL = "your-recipient@domain.com"
@@ -26,6 +138,22 @@ TO_EMAIL = "your-recipient@domain.com"
 # SMTP Email Configuration (for daily automation - RECOMMENDED)
 EMAIL_PASSWORD = os.environ.get('EMAIL_PASSWORD', 'your-email-app-password-here')  # Gmail App Password
 
+# SMTP server override (default: picked from FROM_EMAIL's domain), e.g. a local
+# debugging server: `python -m aiosmtpd -n -l localhost:1025` with SMTP_STARTTLS = False
+SMTP_HOST = None
+SMTP_PORT = 587
+SMTP_STARTTLS = True
+
+# Connections kept open, and messages sent at once, when mailing many recipients
+SMTP_POOL_SIZE = 4
+
+# Email size: attachments over ATTACHMENT_COMPRESS_THRESHOLD_MB are sent as a "zip" or
+# "gzip" copy (None never compresses), and the body lists up to EMAIL_SUMMARY_MAX_ROWS
+# inactive developers so most readers don't need the attachment
+ATTACHMENT_COMPRESS_THRESHOLD_MB = 1
+ATTACHMENT_COMPRESSION = "zip"
+EMAIL_SUMMARY_MAX_ROWS = 50
+
 # Email Template Settings
 EMAIL_SUBJECT_TEMPLATE = "GitLab Activity Report - {date}"
 EMAIL_BODY_TEMPLATE = """Hello,
@@ -0,0 +1,128 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import NamedTuple
+import config
+
+# Stop fetching once a run has taken this many minutes; projects still unfinished are
+# reported as incomplete so the report goes out on time. None means no deadline.
+RUN_DEADLINE_MINUTES = getattr(config, "RUN_DEADLINE_MINUTES", None)
+
+# Seconds one project's event listing may take before the rest of it is skipped
+PROJECT_BUDGET_SECONDS = getattr(config, "PROJECT_BUDGET_SECONDS", None)
+
+DEADLINE_REACHED = "run deadline reached"
+
+_deadline = None
+_local = threading.local()
+
+class BudgetExceeded(Exception):
+    """Raised instead of starting a fetch, or waiting on one, past the run deadline or a time budget"""
+
+class Deadline(NamedTuple):
+    """When (epoch seconds) fetches must stop, and the reason reported if they are cut off"""
+    at: float
+    reason: str
+
+    def left(self):
+        return self.at - time.time()
+
+    def check(self, wait=0.0):
+        """Raise BudgetExceeded if waiting `wait` more seconds would pass the deadline"""
+        if time.time() + wait >= self.at:
+            raise BudgetExceeded(self.reason)
+
+def start_run(deadline=None):
+    """Start the run's clock; worker processes pass the parent's deadline (epoch seconds)"""
+    global _deadline
+    if deadline is None and RUN_DEADLINE_MINUTES:
+        deadline = time.time() + RUN_DEADLINE_MINUTES * 60
+    _deadline = deadline
+    return deadline
+
+def deadline():
+    """Epoch seconds when the current run must stop fetching, or None"""
+    return _deadline
+
+def run_deadline():
+    """The run deadline as a Deadline, or None"""
+    return None if _deadline is None else Deadline(_deadline, DEADLINE_REACHED)
+
+def check_deadline():
+    if _deadline is not None and time.time() >= _deadline:
+        raise BudgetExceeded(DEADLINE_REACHED)
+
+def current_deadline():
+    """The tightest Deadline applied to the calling thread's requests, or None"""
+    return getattr(_local, "deadline", None)
+
+@contextmanager
+def applied(deadline):
+    """Bound every request this thread makes inside the block by `deadline`, unless one is already tighter
+
+    http_client caps its sleeps and timeouts at the time left and raises
+    BudgetExceeded rather than wait past it.
+    """
+    previous = current_deadline()
+    if deadline is None or (previous is not None and previous.at <= deadline.at):
+        deadline = previous
+    _local.deadline = deadline
+    try:
+        yield
+    finally:
+        _local.deadline = previous
+
+class TimeBudget:
+    """Cuts an event stream short when its time budget or the run deadline runs out
+
+    Events arrive newest first, so what was read before the cut still gives
+    the right latest event for every author it contains. `reason` is None
+    while the stream is complete.
+    """
+
+    def __init__(self, seconds=PROJECT_BUDGET_SECONDS):
+        self.limits = []
+        if _deadline is not None:
+            self.limits.append(Deadline(_deadline, DEADLINE_REACHED))
+        if seconds:
+            self.limits.append(Deadline(time.time() + seconds, f"time budget of {seconds}s exceeded"))
+        self.reason = None
+
+    def _expired(self):
+        now = time.time()
+        for deadline in self.limits:
+            if now >= deadline.at:
+                return deadline.reason
+        return None
+
+    def limit(self, events):
+        """Pass events through until the budget runs out
+
+        Checked before each event is read, and applied to the requests that
+        read them, so a throttled or slow page can't run past the budget either.
+        """
+        events = iter(events)
+        tightest = min(self.limits, default=None)
+        while True:
+            self.reason = self._expired()
+            if self.reason:
+                break
+            try:
+                with applied(tightest):
+                    event = next(events)
+            except StopIteration:
+                return
+            except BudgetExceeded as e:
+                self.reason = str(e)
+                break
+            except OSError:
+                # A page read cut off at the deadline fails with a timeout
+                self.reason = self._expired()
+                if not self.reason:
+                    raise
+                break
+            yield event
+        # Closing the stream releases the page it was reading
+        close = getattr(events, "close", None)
+        if close:
+            close()
@@ -0,0 +1,164 @@
+import json
+import os
+import sqlite3
+import threading
+import config
+from gitlab_api import Event
+
+# Checkpoints of the current crawl, so `--resume` can finish an interrupted run
+# without refetching what it already has; None disables checkpointing
+JOURNAL_PATH = getattr(config, "CRAWL_JOURNAL_PATH", "cache/crawl_journal.sqlite3")
+
+class CrawlJournal:
+    """Completed project results and event pagination cursors of the current (or last) run
+
+    A run is identified by its report date and event window; resuming reuses
+    both, so the resumed report is the one the interrupted run would have written.
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        # Sharded crawls checkpoint pages from several processes; wait out their locks
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS run (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                report_date TEXT NOT NULL,
+                after_date TEXT NOT NULL,
+                finished INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS projects (
+                project_id INTEGER PRIMARY KEY,
+                result TEXT NOT NULL
+            );
+            -- Where a project's event listing continues; next_url is NULL once it's exhausted
+            CREATE TABLE IF NOT EXISTS cursors (
+                project_id INTEGER PRIMARY KEY,
+                next_url TEXT,
+                next_params TEXT
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                project_id INTEGER NOT NULL,
+                seq INTEGER NOT NULL,
+                events TEXT NOT NULL,
+                PRIMARY KEY (project_id, seq)
+            );
+            """
+        )
+        self.db.commit()
+
+    def begin(self, report_date, after_date, resume=False):
+        """Start a run, or with `resume` pick up an unfinished one; returns its (report_date, after_date)"""
+        with self.lock:
+            if resume:
+                row = self.db.execute("SELECT report_date, after_date FROM run WHERE finished = 0").fetchone()
+                if row:
+                    return row
+            for table in ("run", "projects", "cursors", "pages"):
+                self.db.execute(f"DELETE FROM {table}")
+            self.db.execute("INSERT INTO run VALUES (1, ?, ?, 0)", (report_date, after_date))
+            self.db.commit()
+        return report_date, after_date
+
+    def finish(self):
+        """Mark the run complete; a later --resume starts a fresh one"""
+        with self.lock:
+            self.db.execute("UPDATE run SET finished = 1")
+            for table in ("projects", "cursors", "pages"):
+                self.db.execute(f"DELETE FROM {table}")
+            self.db.commit()
+
+    def completed(self):
+        """{project_id: (members, latest_by_author, metrics_by_author)} of projects already crawled"""
+        with self.lock:
+            rows = self.db.execute("SELECT project_id, result FROM projects").fetchall()
+        results = {}
+        for project_id, result in rows:
+            members, latest, values = json.loads(result)
+            results[project_id] = (
+                members,
+                {author_id: Event(*event) for author_id, event in latest},
+                {author_id: metric_values for author_id, metric_values in values},
+            )
+        return results
+
+    def save_project(self, project_id, members, latest_by_author, metrics_by_author):
+        """Checkpoint one crawled project; its page checkpoints are no longer needed"""
+        # JSON object keys are strings, so the author indexes are stored as pairs
+        result = json.dumps([members, list(latest_by_author.items()), list(metrics_by_author.items())])
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO projects VALUES (?, ?)", (project_id, result))
+            self.db.execute("DELETE FROM cursors WHERE project_id = ?", (project_id,))
+            self.db.execute("DELETE FROM pages WHERE project_id = ?", (project_id,))
+            self.db.commit()
+
+    def save_page(self, project_id, events, next_url, next_params):
+        """Checkpoint one consumed page of a project's events and where the listing continues"""
+        with self.lock:
+            seq = self.db.execute(
+                "SELECT COUNT(*) FROM pages WHERE project_id = ?", (project_id,)
+            ).fetchone()[0]
+            self.db.execute(
+                "INSERT INTO pages VALUES (?, ?, ?)", (project_id, seq, json.dumps(events))
+            )
+            self.db.execute(
+                "INSERT OR REPLACE INTO cursors VALUES (?, ?, ?)",
+                (project_id, next_url, json.dumps(next_params)),
+            )
+            self.db.commit()
+
+    def load_pages(self, project_id):
+        """Return (checkpointed events, (url, params) to continue from or None, exhausted)"""
+        with self.lock:
+            cursor = self.db.execute(
+                "SELECT next_url, next_params FROM cursors WHERE project_id = ?", (project_id,)
+            ).fetchone()
+            pages = self.db.execute(
+                "SELECT events FROM pages WHERE project_id = ? ORDER BY seq", (project_id,)
+            ).fetchall()
+        events = [Event(*event) for (page,) in pages for event in json.loads(page)]
+        if cursor is None:
+            return events, None, False
+        next_url, next_params = cursor
+        if next_url is None:
+            return events, None, True
+        return events, (next_url, json.loads(next_params)), False
+
+    def resumable_events(self, project_id, fetch):
+        """Yield a project's checkpointed events, then continue the listing where it stopped
+
+        `fetch(start, on_page)` opens the listing like iter_project_events; each
+        page it finishes is checkpointed before the next one is requested.
+        """
+        events, start, exhausted = self.load_pages(project_id)
+        if events or exhausted:
+            print(f"  ↩️ Resuming project ID {project_id} after {len(events)} checkpointed events")
+        yield from events
+        if exhausted:
+            return
+        pending = []
+
+        def on_page(next_url, next_params):
+            self.save_page(project_id, pending, next_url, next_params)
+            pending.clear()
+
+        for event in fetch(start, on_page):
+            pending.append(event)
+            yield event
+
+_journal = None
+_journal_lock = threading.Lock()
+
+def get_journal():
+    """Return the process-wide journal, opening it on first use; None when disabled"""
+    global _journal
+    if not JOURNAL_PATH:
+        return None
+    with _journal_lock:
+        if _journal is None:
+            _journal = CrawlJournal(JOURNAL_PATH)
+        return _journal
@@ -0,0 +1,141 @@
+import base64
+import csv
+import gzip
+import html
+import io
+import json
+import os
+import shutil
+import zipfile
+import config
+
+# Attachments larger than this (MB) are compressed before sending; None sends them as-is
+ATTACHMENT_COMPRESS_THRESHOLD_MB = getattr(config, "ATTACHMENT_COMPRESS_THRESHOLD_MB", 1)
+
+# "zip" opens with a double-click on every desktop; "gzip" suits scripted readers
+ATTACHMENT_COMPRESSION = getattr(config, "ATTACHMENT_COMPRESSION", "zip")
+
+# Inactive developers (no activity in any of their projects) listed in the email body;
+# the attachment has everyone
+EMAIL_SUMMARY_MAX_ROWS = getattr(config, "EMAIL_SUMMARY_MAX_ROWS", 50)
+
+CONTENT_TYPES = {
+    ".csv": "text/csv",
+    ".jsonl": "application/x-ndjson",
+    ".gz": "application/gzip",
+    ".zip": "application/zip",
+    ".parquet": "application/vnd.apache.parquet",
+    ".arrow": "application/vnd.apache.arrow.file",
+}
+
+# Already compressed; compressing again only costs time
+COMPRESSED_EXTENSIONS = (".gz", ".zip", ".parquet")
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# A multiple of 57 bytes, so every chunk encodes to whole 76-character base64 lines
+ENCODE_CHUNK_SIZE = 57 * 1024
+
+def content_type(path):
+    return CONTENT_TYPES.get(os.path.splitext(path)[1], "application/octet-stream")
+
+def compress_attachment(path, threshold_mb=ATTACHMENT_COMPRESS_THRESHOLD_MB, method=ATTACHMENT_COMPRESSION):
+    """Return `path`, or a compressed copy next to it when the file is over the threshold
+
+    The file is compressed chunk by chunk, so it is never held in memory whole.
+    A copy that came out no smaller is deleted and the original sent instead.
+    """
+    size = os.path.getsize(path)
+    if threshold_mb is None or size <= threshold_mb * 1024 * 1024 or path.endswith(COMPRESSED_EXTENSIONS):
+        return path
+    if method == "gzip":
+        target = f"{path}.gz"
+        with open(path, "rb") as source, gzip.open(target, "wb") as compressed:
+            shutil.copyfileobj(source, compressed, COPY_CHUNK_SIZE)
+    elif method == "zip":
+        target = f"{path}.zip"
+        with open(path, "rb") as source, zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as archive:
+            with archive.open(os.path.basename(path), "w", force_zip64=True) as compressed:
+                shutil.copyfileobj(source, compressed, COPY_CHUNK_SIZE)
+    else:
+        raise ValueError(f"Unknown attachment compression: {method}")
+    compressed_size = os.path.getsize(target)
+    if compressed_size >= size:
+        os.remove(target)
+        print(f"🗜️ Sending {os.path.basename(path)} uncompressed: compressing it saved nothing")
+        return path
+    print(f"🗜️ Compressed {os.path.basename(path)}: {size} → {compressed_size} bytes")
+    return target
+
+def iter_base64(path, mime_lines=False):
+    """Yield a file's base64 encoding piece by piece, as 76-character MIME lines or one unbroken string"""
+    encode = base64.encodebytes if mime_lines else base64.b64encode
+    with open(path, "rb") as file:
+        while True:
+            chunk = file.read(ENCODE_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield encode(chunk).decode("ascii")
+
+def _iter_report_rows(report_path):
+    """Yield (developer, project, latest activity) from a csv, csv.gz or jsonl report"""
+    if report_path.endswith(".jsonl"):
+        with open(report_path) as file:
+            for line in file:
+                row = json.loads(line)
+                yield row["developer"], row["project"], row["latest_activity"]
+        return
+    opener = gzip.open if report_path.endswith(".gz") else open
+    with opener(report_path, "rt", newline="") as file:
+        reader = csv.reader(file)
+        next(reader, None)
+        for row in reader:
+            yield row[1], row[3], row[4]
+
+def inactive_developers(report_path):
+    """Return ({developer: [projects]}, rows, incomplete rows) for developers with no activity in any project
+
+    Developers with an Incomplete row might have been active there, so they
+    are left out. None for binary formats.
+    """
+    if not report_path.endswith((".csv", ".csv.gz", ".jsonl")):
+        return None
+    no_activity = {}
+    not_inactive = set()
+    rows = incomplete = 0
+    for developer, project, latest_activity in _iter_report_rows(report_path):
+        rows += 1
+        if latest_activity == "No Activity":
+            no_activity.setdefault(developer, []).append(project)
+        else:
+            not_inactive.add(developer)
+            if latest_activity.startswith("Incomplete"):
+                incomplete += 1
+    inactive = {developer: projects for developer, projects in no_activity.items() if developer not in not_inactive}
+    return inactive, rows, incomplete
+
+def summary_html(report_path, body, max_rows=EMAIL_SUMMARY_MAX_ROWS):
+    """The plain-text `body` as HTML, followed by a table of the report's inactive developers"""
+    out = io.StringIO()
+    out.write('<html><body style="font-family: sans-serif">\n')
+    out.write(f'<div style="white-space: pre-wrap">{html.escape(body)}</div>\n')
+    summary = inactive_developers(report_path)
+    if summary is not None:
+        inactive, rows, incomplete = summary
+        out.write(f"<h3>Inactive developers: {len(inactive)}</h3>\n")
+        if inactive:
+            out.write('<table border="1" cellpadding="4" style="border-collapse: collapse">\n')
+            out.write("<tr><th>Developer</th><th>Projects</th></tr>\n")
+            for developer in sorted(inactive)[:max_rows]:
+                projects = ", ".join(html.escape(project) for project in inactive[developer])
+                out.write(f"<tr><td>{html.escape(developer)}</td><td>{projects}</td></tr>\n")
+            out.write("</table>\n")
+            if len(inactive) > max_rows:
+                out.write(f"<p>…and {len(inactive) - max_rows} more in the attached report.</p>\n")
+        else:
+            out.write("<p>Every developer had activity in the report window.</p>\n")
+        if incomplete:
+            out.write(f"<p>{incomplete} of {rows} rows could not be fully checked in time "
+                      f"and are marked Incomplete in the report.</p>\n")
+    out.write("</body></html>\n")
+    return out.getvalue()
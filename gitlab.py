@@ -1,94 +1,563 @@
+import argparse
+import math
+import multiprocessing
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import quote
+from datetime import datetime, timedelta, timezone
 import requests
-import csv
-from datetime import datetime, timedelta
-from config import API_URL, HEADERS, PROJECTS
+import config
+from config import PROJECTS
+import activity_store
+import crawl_budget
+import crawl_journal
+from activity_metrics import ActivityAggregator, empty_values
+from activity_table import ActivityTable
+import http_cache
+import http_client
+import metrics
+from membership import USER_FIELDS, MembershipResolver
+from report_history import HistorySink
+from report_partitions import ReportPartitioner
+from report_sinks import ReportWriter
+from gitlab_api import (
+    GitLabAPIError,
+    iter_group_projects,
+    iter_project_events,
+    iter_project_members,
+    iter_user_events,
+)
+
+# Number of member/event fetches that may be queued at once; the per-host
+# in-flight cap in http_client keeps GitLab from seeing more than that.
+CRAWL_WORKERS = getattr(config, "CRAWL_WORKERS", 8)
+
+# Keep a local event store and only fetch events newer than the previous run
+INCREMENTAL_FETCH = getattr(config, "INCREMENTAL_FETCH", True)
+
+# Monitor every project of this group (and its subgroups) instead of PROJECTS
+MONITOR_GROUP = getattr(config, "MONITOR_GROUP", None)
+
+# "project" fetches events per project, "user" fetches them per member across all
+# projects, "auto" picks whichever needs fewer calls once the member lists are in.
+# Per-user fetching is opt-in: members with a private profile show no events there.
+FETCH_STRATEGY = getattr(config, "FETCH_STRATEGY", "project")
+
+# Worker processes for very large project lists: each crawls and parses its own
+# shards and sends back only the latest event per member; 1 keeps everything in-process
+CRAWL_PROCESSES = getattr(config, "CRAWL_PROCESSES", 1)
+
+# Shards queued per process, so fast shards free a worker for the next one
+SHARDS_PER_PROCESS = 4
+
+# Build reports from the events webhook_receiver.py writes into the activity store;
+# a project is only polled again (to catch missed deliveries) every RECONCILE_HOURS.
+# Keep it clearly off the run cadence: at exactly 24h, whether a daily run polls
+# depends on a few seconds of timing. 20h makes every daily run reconcile.
+WEBHOOK_INGEST = getattr(config, "WEBHOOK_INGEST", False)
+RECONCILE_HOURS = getattr(config, "RECONCILE_HOURS", 20)
+
+# Fetch each group's members once and only direct members per project, instead of
+# every project's full /members/all list (which repeats the group members each time).
+# None turns it on only when the projects already carry their namespace (MONITOR_GROUP
+# discovery); for plain PROJECTS entries it would cost an extra lookup per project.
+RESOLVE_MEMBERS_BY_GROUP = getattr(config, "RESOLVE_MEMBERS_BY_GROUP", None)
+
+# Upsert every run into the report history index for report_history.py queries
+REPORT_HISTORY = getattr(config, "REPORT_HISTORY", True)
 
 # === FUNCTIONS ===
 
-def get_project_members(project_id):
-    print(f"  → Fetching members for project ID: {project_id}")
-    res = requests.get(f"{API_URL}/projects/{project_id}/members/all", headers=HEADERS)
-    print(f"  → Members API response: {res.status_code}")
-    if res.status_code == 200:
-        members = res.json()
-        print(f"  → Found {len(members)} members")
-        return members
+def get_project_members(project, resolver=None):
+    print(f"  → Fetching members for project ID: {project['id']}")
+    if resolver:
+        members = resolver.project_members(project)
+    else:
+        members = list(iter_project_members(project["id"]))
+    print(f"  → Found {len(members)} members")
+    return members
+
+def get_project_events(project_id, after_date, since=None):
+    """Stream a project's events page by page instead of loading the whole window"""
+    if since:
+        print(f"  → Fetching events for project ID: {project_id} since {since}")
     else:
-        print(f"  → Error getting members: {res.text}")
-        return []
-
-def get_user_events(project_id, user_id, after_date):
-    print(f"    → Getting events for user {user_id} after {after_date}")
-    res = requests.get(
-        f"{API_URL}/projects/{project_id}/events",
-        headers=HEADERS,
-        params={"after": after_date}
+        print(f"  → Fetching events for project ID: {project_id} after {after_date}")
+    journal = crawl_journal.get_journal()
+    if journal is None:
+        return iter_project_events(project_id, after_date, since)
+    return journal.resumable_events(
+        project_id,
+        lambda start, on_page: iter_project_events(project_id, after_date, since, start, on_page),
     )
-    print(f"    → Events API response: {res.status_code}")
-    if res.status_code == 200:
-        all_events = res.json()
-        user_events = [e for e in all_events if e["author_id"] == user_id]
-        print(f"    → Found {len(user_events)} events for this user")
-        return user_events
+
+def needs_reconcile(watermark, after_date):
+    """True when webhook-fed events can't be trusted alone: never polled, window widened, or poll too old"""
+    if not watermark or not watermark["synced_at"] or watermark["window_start"] > after_date:
+        return True
+    synced_at = datetime.fromisoformat(watermark["synced_at"].replace("Z", "+00:00"))
+    return datetime.now(timezone.utc) - synced_at >= timedelta(hours=RECONCILE_HOURS)
+
+def sync_project_events(project_id, after_date, budget=None):
+    """Fetch only events newer than the stored high-water mark, then read the window from the store
+
+    If `budget` cuts the fetch short, only the fetched events are returned and
+    the store is left alone, so the next run fetches the missed ones again.
+    """
+    store = activity_store.get_store()
+    watermark = store.get_watermark(project_id)
+    if WEBHOOK_INGEST and not needs_reconcile(watermark, after_date):
+        print(f"  → Using webhook events for project ID: {project_id}")
+        return store.iter_events(project_id, after_date)
+    since = None
+    if watermark and watermark["window_start"] <= after_date:
+        # A wider window than last time needs a full refetch to fill the gap
+        since = watermark["last_created_at"]
+    synced_at = activity_store.utc_now()
+    new_events = get_project_events(project_id, after_date, since)
+    new_events = list(budget.limit(new_events) if budget else new_events)
+    if budget and budget.reason:
+        # Merging would move the high-water mark past the events that were cut off
+        return new_events
+    store.merge(project_id, new_events, after_date, synced_at)
+    return store.iter_events(project_id, after_date)
+
+def get_project_activity(project_id, after_date):
+    """Load a project's events in the window into a columnar ActivityTable
+
+    Returns (table, {author_id: report metric values}, reason the events were
+    cut short or None), with the table and metrics built in the same pass.
+    """
+    budget = crawl_budget.TimeBudget()
+    if INCREMENTAL_FETCH or WEBHOOK_INGEST:
+        events = sync_project_events(project_id, after_date, budget)
     else:
-        print(f"    → Error getting events: {res.text}")
-        return []
+        events = budget.limit(get_project_events(project_id, after_date))
+    aggregator = ActivityAggregator()
+    table = ActivityTable.from_events(aggregator.observe(events), project_id)
+    return table, aggregator.by_project().get(project_id, {}), budget.reason
+
+def get_monitored_projects():
+    """Return PROJECTS, or the projects discovered in MONITOR_GROUP (cached like other listings)"""
+    if not MONITOR_GROUP:
+        return PROJECTS
+    print(f"🔎 Discovering projects in group: {MONITOR_GROUP}")
+    # Namespace and sharing details let the membership resolver skip a lookup per project
+    projects = [
+        {"name": project["name"], "id": project["id"], "namespace": project.get("namespace"),
+         "shared_with_groups": project.get("shared_with_groups", [])}
+        for project in iter_group_projects(quote(MONITOR_GROUP, safe=""), include_subgroups=True)
+    ]
+    print(f"  → Found {len(projects)} projects")
+    return projects
+
+def get_user_activity(user_id, after_date, project_ids):
+    """Load one user's events in the monitored projects into a columnar ActivityTable
+
+    Returns (table, {project_id: {user_id: report metric values}}, reason the
+    events were cut short by the run deadline or None).
+    """
+    # Project time budgets don't apply to a user's events, which span every project
+    budget = crawl_budget.TimeBudget(seconds=None)
+    events = budget.limit(iter_user_events(user_id, after_date))
+    aggregator = ActivityAggregator()
+    table = ActivityTable.from_events(aggregator.observe(e for e in events if e.project_id in project_ids))
+    return table, aggregator.by_project(), budget.reason
+
+def resolve_members_by_group(projects):
+    """Whether to use the MembershipResolver for `projects` (see RESOLVE_MEMBERS_BY_GROUP)"""
+    if RESOLVE_MEMBERS_BY_GROUP is not None:
+        return RESOLVE_MEMBERS_BY_GROUP
+    return bool(projects) and all("namespace" in project for project in projects)
+
+def _member_ids(member_futures):
+    """Distinct user IDs across the member lists that were fetched successfully"""
+    user_ids = set()
+    for future in member_futures:
+        if future.exception() is None:
+            user_ids.update(member["id"] for member in future.result())
+    return user_ids
+
+def choose_fetch_strategy(projects, member_futures):
+    """Fetch events per user when there are fewer distinct members than projects"""
+    if WEBHOOK_INGEST:
+        # Only the per-project path reads the webhook-fed store
+        return "project"
+    if FETCH_STRATEGY != "auto":
+        return FETCH_STRATEGY
+    return "user" if len(_member_ids(member_futures)) < len(projects) else "project"
+
+def fetch_latest_by_user(pool, projects, member_futures, after_date, activity):
+    """Fetch each member's events once and split them into per-project author indexes and metrics"""
+    project_ids = {project["id"] for project in projects}
+    user_ids = sorted(_member_ids(member_futures))
+    print(f"👥 Fetching events for {len(user_ids)} users across {len(projects)} projects")
+    user_futures = [
+        (user_id, pool.submit(get_user_activity, user_id, after_date, project_ids))
+        for user_id in user_ids
+    ]
+    latest_by_project = {project_id: {} for project_id in project_ids}
+    metrics_by_project = {project_id: {} for project_id in project_ids}
+    cut_short = {}
+    for user_id, future in user_futures:
+        try:
+            table, user_metrics, reason = future.result()
+        except GitLabAPIError as e:
+            # Only this user's rows are in doubt; they read "Incomplete" rather than "No Activity"
+            print(f"\n❌ Failed to fetch events of user ID {user_id}: {e}")
+            cut_short[user_id] = (f"events fetch failed with {e.status_code}" if e.status_code
+                                  else "events fetch failed: malformed response")
+            continue
+        except requests.RequestException as e:
+            # Connection errors and timeouts that outlasted the retries
+            print(f"\n❌ Failed to fetch events of user ID {user_id}: {e}")
+            cut_short[user_id] = f"events fetch failed: {type(e).__name__}"
+            continue
+        if reason:
+            cut_short[user_id] = reason
+        activity.extend(table)
+        for project_id, event in table.latest_by("project_id").items():
+            latest_by_project[project_id][user_id] = event
+        for project_id, values in user_metrics.items():
+            metrics_by_project[project_id].update(values)
+    # Hand back futures so the caller treats both strategies the same way
+    results = []
+    for project in projects:
+        result = Future()
+        result.set_result((latest_by_project[project["id"]], metrics_by_project[project["id"]], cut_short))
+        results.append(result)
+    return results
+
+def _timed(project, func, *args):
+    """Run one fetch for `project` within the run deadline, and charge its duration to the project"""
+    crawl_budget.check_deadline()
+    started = time.perf_counter()
+    try:
+        with crawl_budget.applied(crawl_budget.run_deadline()):
+            return func(*args)
+    finally:
+        metrics.record_project(project["name"], time.perf_counter() - started)
+
+def crawl_projects(projects, after_date, activity):
+    """Fetch members and events for all projects concurrently, yielding results in project order
+
+    Each result is (project, members, latest_by_author, metrics_by_author,
+    incomplete), where `incomplete` maps members whose events were cut short
+    by a time budget (or, fetching per user, failed) to the reason; their latest event, if one was read before
+    the cut, is still right, but their metrics only count what was read. Projects that failed have no members, and
+    `incomplete` is then the reason if the run deadline skipped them.
+    Every fetched event is also appended to the run-wide `activity` table.
+    """
+    resolver = MembershipResolver() if resolve_members_by_group(projects) else None
+    with ThreadPoolExecutor(max_workers=CRAWL_WORKERS) as pool:
+        member_futures = [
+            pool.submit(_timed, project, get_project_members, project, resolver) for project in projects
+        ]
+        strategy = choose_fetch_strategy(projects, member_futures)
+        if strategy == "user":
+            latest_futures = fetch_latest_by_user(pool, projects, member_futures, after_date, activity)
+        else:
+            latest_futures = [
+                pool.submit(_timed, project, get_project_activity, project["id"], after_date)
+                for project in projects
+            ]
+        for project, members, latest in zip(projects, member_futures, latest_futures):
+            try:
+                if strategy == "user":
+                    latest_by_author, metrics_by_author, cut_short = latest.result()
+                else:
+                    table, metrics_by_author, reason = latest.result()
+                    activity.extend(table)
+                    latest_by_author = table.latest_by("author_id")
+                    cut_short = {}
+                    if reason:
+                        print(f"\n⏰ Stopped fetching project {project['name']} early: {reason}")
+                        cut_short = {member["id"]: reason for member in members.result()}
+                project_members = members.result()
+                incomplete = {
+                    member["id"]: cut_short[member["id"]] for member in project_members if member["id"] in cut_short
+                }
+                result = project_members, latest_by_author, metrics_by_author, incomplete
+            except (GitLabAPIError, requests.RequestException) as e:
+                # Failed fetches (error statuses, or connection errors and timeouts that outlasted
+                # the retries) yield None so they are reported, not turned into "No Activity"
+                print(f"\n❌ Failed to fetch project {project['name']}: {e}")
+                result = None, None, None, None
+            except crawl_budget.BudgetExceeded as e:
+                print(f"\n⏰ Skipped project {project['name']}: {e}")
+                result = None, None, None, str(e)
+            yield (project,) + result
+    if resolver:
+        stats = resolver.get_stats()
+        print(f"👥 Membership: {stats['fetches']} lookups for {stats['users']} distinct users")
+
+def _add_counts(totals, counts):
+    """Add every number in `counts` into `totals`, recursing into nested dicts"""
+    for key, value in counts.items():
+        if isinstance(value, dict):
+            _add_counts(totals.setdefault(key, {}), value)
+        else:
+            totals[key] = totals.get(key, 0) + value
+
+def _count_delta(after, before):
+    return {key: after[key] - before[key] for key in after}
+
+def _init_shard_worker(processes):
+    """Give a crawl process its own connections and handles, and its share of the per-host limits"""
+    http_client._sessions.clear()
+    http_client._host_slots.clear()
+    http_client._limiters.clear()
+    http_client.REQUESTS_PER_SECOND /= processes
+    http_client.REQUEST_BURST = max(1, http_client.REQUEST_BURST // processes)
+    http_client.MAX_IN_FLIGHT_PER_HOST = max(1, http_client.MAX_IN_FLIGHT_PER_HOST // processes)
+    # SQLite connections and open files must not be shared with the parent after a fork
+    http_cache._cache = None
+    activity_store._store = None
+    crawl_journal._journal = None
+    metrics._log_file = None
+
+def crawl_shard(shard, after_date, run_id, deadline):
+    """Crawl one shard in a worker process; returns compact per-project results and the shard's counters"""
+    metrics.start_run(run_id)
+    crawl_budget.start_run(deadline)
+    http_before = http_client.get_stats()
+    cache_before = http_cache.get_stats()
+    activity = ActivityTable()
+    results = []
+    for project, members, *result in crawl_projects(shard, after_date, activity):
+        if members is not None:
+            members = [{key: member[key] for key in USER_FIELDS} for member in members]
+        results.append((members, *result))
+    totals = {
+        "activity": summarize_activity(activity),
+        "http": _count_delta(http_client.get_stats(), http_before),
+        "cache": _count_delta(http_cache.get_stats(), cache_before),
+    }
+    return results, totals, metrics.export_run()
+
+def crawl_sharded(projects, after_date, totals):
+    """Partition projects across CRAWL_PROCESSES worker processes, yielding results in project order
+
+    The workers' activity, HTTP and cache counters are added into `totals`.
+    """
+    size = math.ceil(len(projects) / (CRAWL_PROCESSES * SHARDS_PER_PROCESS))
+    shards = [projects[i:i + size] for i in range(0, len(projects), size)]
+    # Forked workers inherit runtime settings; SQLite handles are reopened by the initializer
+    start_method = "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+    print(f"🧩 Crawling {len(projects)} projects in {len(shards)} shards across {CRAWL_PROCESSES} processes")
+    with ProcessPoolExecutor(
+        max_workers=CRAWL_PROCESSES,
+        mp_context=multiprocessing.get_context(start_method),
+        initializer=_init_shard_worker,
+        initargs=(CRAWL_PROCESSES,),
+    ) as pool:
+        futures = [
+            pool.submit(crawl_shard, shard, after_date, metrics.run_id(), crawl_budget.deadline())
+            for shard in shards
+        ]
+        for shard, future in zip(shards, futures):
+            results, shard_totals, shard_metrics = future.result()
+            _add_counts(totals, shard_totals)
+            metrics.merge_run(shard_metrics)
+            for project, result in zip(shard, results):
+                yield (project,) + result
+
+def checkpoint_results(projects, completed, results, journal):
+    """Yield every project's result in project order: journaled ones as stored, crawled ones once checkpointed
+
+    `results` covers the projects missing from `completed`, in the same order.
+    Projects cut short by a time budget are not checkpointed, so --resume refetches them.
+    """
+    for project in projects:
+        if project["id"] in completed:
+            yield (project,) + completed[project["id"]] + ({},)
+            continue
+        result = next(results)
+        _, members, latest_by_author, metrics_by_author, incomplete = result
+        if journal and members is not None and not incomplete:
+            members = [{key: member[key] for key in USER_FIELDS} for member in members]
+            journal.save_project(project["id"], members, latest_by_author, metrics_by_author)
+        yield result
+
+def summarize_activity(activity):
+    """Event count, counts per action and per day; shards' summaries add up with _add_counts"""
+    return {
+        "events": len(activity),
+        "by_action": activity.counts_by_action(),
+        "by_day": activity.daily_histogram(),
+    }
+
+def print_activity_summary(summary):
+    print(f"📈 Events in window: {summary['events']}")
+    for action_name, count in sorted(summary["by_action"].items(), key=lambda item: (-item[1], item[0])):
+        print(f"  - {action_name.capitalize()}: {count}")
+    for day, count in sorted(summary["by_day"].items()):
+        print(f"  {day}: {count}")
+
+def build_project_rows(project, members, latest_by_author, metrics_by_author, incomplete=None):
+    """Turn one project's members, their latest events and metric values into report rows
+
+    Members in `incomplete` with no event read before their fetch ran out of
+    time get an "Incomplete" row with the reason instead of "No Activity". Their
+    latest event, if one was read, is still right, but metrics counted from a
+    cut-short stream are not, so every member in `incomplete` gets None metrics
+    (which typed sinks keep in their integer columns).
+    """
+    no_activity = empty_values()
+    rows = []
+    for member in members:
+        user_id = member["id"]
+        username = member["username"]
+        name = member["name"]
+        
+        print(f"  👤 Checking user: {name} (@{username})")
+
+        latest_event = latest_by_author.get(user_id)
+        cut_short = bool(incomplete) and user_id in incomplete
+
+        if latest_event:
+            print(f"    ✅ Latest activity: {latest_event.action_name}")
+            if cut_short:
+                print(f"    ⏳ Metrics not fully counted: {incomplete[user_id]}")
+            rows.append([
+                name,
+                username,
+                project["name"],
+                latest_event.action_name.capitalize(),
+                latest_event.created_at,
+                *([None] * len(no_activity) if cut_short else metrics_by_author.get(user_id, no_activity))
+            ])
+        elif cut_short:
+            print(f"    ⏳ Not fully checked: {incomplete[user_id]}")
+            rows.append([name, username, project["name"], f"Incomplete ({incomplete[user_id]})", "",
+                         *[None] * len(no_activity)])
+        else:
+            print(f"    ❌ No recent activity")
+            rows.append([name, username, project["name"], "No Activity", "", *no_activity])
+    return rows
+
+def format_coverage(coverage):
+    """One line saying how much of the run's projects and developers were fully checked"""
+    return (
+        f"{coverage['complete']}/{coverage['projects']} projects complete "
+        f"({len(coverage['incomplete'])} cut short, {len(coverage['skipped'])} skipped at the deadline, "
+        f"{len(coverage['failed'])} failed); "
+        f"{coverage['developers'] - coverage['incomplete_developers']}/{coverage['developers']} "
+        f"developer rows fully checked"
+    )
 
 # === MAIN ===
-def generate_report():
-    report_data = []
+def build_reports(resume=False):
+    """Crawl once and write the full report plus each recipient's filtered copy
+
+    With `resume`, an interrupted run is finished from its checkpoints, with
+    the same report date and window. With RUN_DEADLINE_MINUTES or
+    PROJECT_BUDGET_SECONDS, fetching stops on time and unfinished members are
+    reported as incomplete. Returns (report path, {recipient: report path},
+    coverage), coverage being the counts format_coverage() describes.
+    """
+    metrics.start_run()
+    crawl_budget.start_run()
+    # The counters live as long as the process; a long-running service reports each run's share
+    http_before = http_client.get_stats()
+    cache_before = http_cache.get_stats()
+    coverage = {"projects": 0, "complete": 0, "incomplete": [], "skipped": [], "failed": [],
+                "developers": 0, "incomplete_developers": 0}
+    failed_projects = coverage["failed"]
+    activity = ActivityTable()
     last_week = (datetime.now() - timedelta(days=7)).date().isoformat()
+    today = datetime.now().date().isoformat()
+    journal = crawl_journal.get_journal()
+    completed = {}
+    if journal:
+        today, last_week = journal.begin(today, last_week, resume)
+        completed = journal.completed()
     print(f"Looking for activity after: {last_week}")
 
-    for project in PROJECTS:
-        project_name = project["name"]
-        project_id = project["id"]
-        
-        print(f"\n🔍 Processing project: {project_name} (ID: {project_id})")
+    # Rows are streamed to disk as each project completes
+    extra_sinks = [HistorySink(today)] if REPORT_HISTORY else []
+    report = ReportWriter(f"gitlab_activity_report_{today}", extra_sinks=extra_sinks)
+    partitions = ReportPartitioner(f"gitlab_activity_report_{today}")
 
-        members = get_project_members(project_id)
-        
-        if not members:
-            print(f"  ⚠️ No members found for {project_name}")
-            continue
-            
-        for member in members:
-            user_id = member["id"]
-            username = member["username"]
-            name = member["name"]
+    projects = get_monitored_projects()
+    totals = {"activity": {}, "http": {}, "cache": {}}
+    pending = [project for project in projects if project["id"] not in completed]
+    if len(pending) < len(projects):
+        print(f"↩️ Resuming: {len(projects) - len(pending)} of {len(projects)} projects restored from checkpoints")
+    if CRAWL_PROCESSES > 1 and len(pending) > 1:
+        results = crawl_sharded(pending, last_week, totals)
+    else:
+        results = crawl_projects(pending, last_week, activity)
+    results = checkpoint_results(projects, completed, results, journal)
+
+    coverage["projects"] = len(projects)
+    with report, partitions:
+        for project, members, latest_by_author, metrics_by_author, incomplete in results:
+            project_name = project["name"]
+            project_id = project["id"]
             
-            print(f"  👤 Checking user: {name} (@{username})")
-
-            events = get_user_events(project_id, user_id, last_week)
-            latest_event = max(events, key=lambda e: e["created_at"], default=None)
-
-            if latest_event:
-                print(f"    ✅ Latest activity: {latest_event['action_name']}")
-                report_data.append([
-                    name,
-                    project_name,
-                    latest_event["action_name"].capitalize(),
-                    latest_event["created_at"]
-                ])
+            if members is None:
+                (coverage["skipped"] if incomplete else failed_projects).append(project_name)
+                continue
+            if incomplete:
+                coverage["incomplete"].append(project_name)
             else:
-                print(f"    ❌ No recent activity")
-                report_data.append([name, project_name, "No Activity", ""])
+                coverage["complete"] += 1
 
-    print(f"\n📊 Total report entries: {len(report_data)}")
-    
-    # Save as CSV
-    today = datetime.now().date().isoformat()
-    filename = f"gitlab_activity_report_{today}.csv"
-    with open(filename, "w", newline="") as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(["#", "Developer Name", "Project", "Latest Activity", "Activity Timestamp"])
-        for idx, row in enumerate(report_data, start=1):
-            writer.writerow([idx] + row)
-
-    print(f"✅ Report saved: {filename}")
+            print(f"\n🔍 Processing project: {project_name} (ID: {project_id})")
+            
+            if not members:
+                print(f"  ⚠️ No members found for {project_name}")
+                continue
+
+            rows = build_project_rows(project, members, latest_by_author, metrics_by_author, incomplete)
+            coverage["developers"] += len(rows)
+            # Members with events read before a cut still have partial metrics
+            coverage["incomplete_developers"] += sum(member["id"] in incomplete for member in members)
+            report.write_rows(rows)
+            partitions.write_project(project, members, rows)
+
+    # Unfinished projects keep the run open, so --resume only has to refetch those
+    if journal and coverage["complete"] == len(projects):
+        journal.finish()
+    print(f"\n📊 Total report entries: {report.count}")
+    _add_counts(totals["activity"], summarize_activity(activity))
+    _add_counts(totals["http"], _count_delta(http_client.get_stats(), http_before))
+    _add_counts(totals["cache"], _count_delta(http_cache.get_stats(), cache_before))
+    print_activity_summary(totals["activity"])
+    stats = totals["http"]
+    print(f"🔁 API requests: {stats['requests']}, retries: {stats['retries']}, "
+          f"rate limited: {stats['rate_limited']}, throttled: {stats['throttled_seconds']:.1f}s")
+    cache_stats = totals["cache"]
+    print(f"💾 Cache hits: {cache_stats['hits']}, revalidated: {cache_stats['revalidated']}, "
+          f"misses: {cache_stats['misses']}")
+    summary = metrics.summarize()
+    metrics.print_summary(summary)
+    metrics.write_prometheus(summary)
+    if failed_projects:
+        print(f"⚠️ Projects missing from the report: {', '.join(failed_projects)}")
+    if coverage["skipped"]:
+        print(f"⏰ Projects skipped at the run deadline: {', '.join(coverage['skipped'])}")
+    if coverage["incomplete"]:
+        print(f"⏳ Projects stopped before all their events were read: {', '.join(coverage['incomplete'])}")
+    print(f"🧭 Coverage: {format_coverage(coverage)}")
+
+    for path in report.paths:
+        print(f"✅ Report saved: {path}")
+    for recipient, path in partitions.paths.items():
+        print(f"✅ Report for {recipient} saved: {path}")
     
-    if len(report_data) == 0:
+    if report.count == 0:
         print("⚠️ No data was collected. Check the debugging output above.")
 
+    return report.paths[0], partitions.paths, coverage
+
+def generate_report(resume=False):
+    """Crawl once and write the reports; returns the path of the full report that gets emailed"""
+    return build_reports(resume)[0]
+
 if __name__ == "__main__":
-    generate_report()
+    parser = argparse.ArgumentParser(description="Generate the GitLab activity report")
+    parser.add_argument("--resume", action="store_true",
+                        help="finish an interrupted run from its checkpoints instead of starting over")
+    generate_report(parser.parse_args().resume)
@@ -0,0 +1,212 @@
+import codecs
+import json
+from datetime import date, timedelta
+from typing import NamedTuple, Optional
+import config
+from config import API_URL
+import http_client
+from http_cache import cached_get
+
+# GitLab caps per_page at 100; the default of 20 silently truncates busy projects
+PER_PAGE = 100
+
+# Seconds a cached response is served without asking GitLab; after that it is
+# revalidated with If-None-Match. Events change constantly and are never cached.
+CACHE_TTLS = getattr(config, "CACHE_TTLS", {"members": 3600, "projects": 86400})
+
+# Bytes read from the socket per step when streaming a page
+STREAM_CHUNK_SIZE = 64 * 1024
+
+class Event(NamedTuple):
+    """The handful of event fields the monitor reads; everything else is dropped while parsing"""
+    project_id: int
+    author_id: int
+    action_name: str
+    created_at: str
+    id: Optional[int] = None
+    target_type: Optional[str] = None
+    commit_count: int = 0
+
+EVENT_KEYS = frozenset(Event._fields)
+
+def _keep_event_keys(pairs):
+    # Called for every JSON object, innermost first, so nested payloads such as
+    # author or note shrink to (at most) their id before the event does, and
+    # push_data is already down to its commit_count when it gets flattened here
+    fields = {}
+    for key, value in pairs:
+        if key in EVENT_KEYS:
+            fields[key] = value
+        elif key == "push_data" and value:
+            fields["commit_count"] = value.get("commit_count") or 0
+    return fields
+
+_event_decoder = json.JSONDecoder(object_pairs_hook=_keep_event_keys)
+
+class GitLabAPIError(Exception):
+    """Raised when GitLab still refuses a request after retries, so callers never mistake it for an empty result"""
+
+    def __init__(self, path, response):
+        super().__init__(f"{path}: {response.status_code} - {response.text}")
+        self.path = path
+        self.status_code = response.status_code
+
+class MalformedResponseError(GitLabAPIError):
+    """Raised when a streamed page ends early or holds invalid JSON, so its missing items aren't read as absent"""
+
+    def __init__(self, path, error):
+        Exception.__init__(self, f"{path}: malformed response - {error}")
+        self.path = path
+        self.status_code = None
+
+def _next_request(url, res, params):
+    """Work out the URL and params for the page after `res`, or (None, None) on the last page"""
+    # Keyset pagination only advertises the next page through the Link header,
+    # and the link already carries every query parameter including the cursor.
+    next_link = res.links.get("next", {}).get("url")
+    if next_link:
+        return next_link, None
+    next_page = res.headers.get("X-Next-Page")
+    if next_page:
+        return url, dict(params or {}, page=next_page)
+    return None, None
+
+def _iter_json_array(chunks, decoder):
+    """Yield the elements of a JSON array one by one as its bytes arrive"""
+    text = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    started = False
+    for chunk in chunks:
+        buffer += text.decode(chunk)
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buffer):
+                break
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError(f"Expected a JSON array, got {buffer[pos:pos + 20]!r}")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                item, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # The element may be cut off mid-chunk; wait for more bytes
+                break
+            yield item
+        buffer = buffer[pos:]
+    # The body ended without the closing "]": a truncated response or an invalid element
+    rest = (buffer + text.decode(b"", final=True)).lstrip(" \t\r\n,")
+    if started and rest:
+        # Raises the real parse error when the element itself is invalid
+        decoder.raw_decode(rest)
+    raise ValueError("response ended before the end of the JSON array")
+
+def _iter_page(path, chunks, decoder):
+    """_iter_json_array, reporting a broken page as a GitLab API error like any other failed request"""
+    try:
+        yield from _iter_json_array(chunks, decoder)
+    except ValueError as e:
+        raise MalformedResponseError(path, e) from e
+
+def iter_pages(path, params=None, cache_ttl=0, decoder=None, start=None, on_page=None):
+    """Yield one page of results at a time, following X-Next-Page/Link headers
+
+    With a `decoder`, each page is an iterator parsed straight off the socket
+    instead of a list built from the whole body; such pages bypass the cache.
+    `start` is a (url, params) cursor to continue from instead of the first
+    page, and `on_page(url, params)` receives the next page's cursor once a
+    page has been consumed (url is None after the last one).
+    """
+    if start:
+        url, params = start
+    else:
+        url = f"{API_URL}{path}"
+        params = dict(params or {})
+        params.setdefault("per_page", PER_PAGE)
+    while url:
+        if decoder is None:
+            res = cached_get(url, params, cache_ttl)
+        else:
+            res = http_client.request("GET", url, params=params, stream=True)
+        try:
+            if res.status_code != 200:
+                raise GitLabAPIError(path, res)
+            if decoder is None:
+                yield res.json()
+            else:
+                yield _iter_page(path, res.iter_content(STREAM_CHUNK_SIZE), decoder)
+        finally:
+            res.close()
+        url, params = _next_request(url, res, params)
+        if on_page:
+            on_page(url, params)
+
+def iter_items(path, params=None, cache_ttl=0, decoder=None, start=None, on_page=None):
+    """Yield individual items across all pages of a list endpoint"""
+    for page in iter_pages(path, params, cache_ttl, decoder, start, on_page):
+        yield from page
+
+def iter_project_members(project_id, inherited=True):
+    """Yield the members of a project, including those inherited from its groups unless `inherited` is False"""
+    path = f"/projects/{project_id}/members/all" if inherited else f"/projects/{project_id}/members"
+    return iter_items(path, cache_ttl=CACHE_TTLS.get("members", 0))
+
+def iter_group_members(group_id):
+    """Yield every member of a group, including those inherited from its parent groups"""
+    return iter_items(f"/groups/{group_id}/members/all", cache_ttl=CACHE_TTLS.get("members", 0))
+
+def get_project(project_id):
+    """Return a project's details (namespace, shared groups), cached like other listings"""
+    path = f"/projects/{project_id}"
+    res = cached_get(f"{API_URL}{path}", ttl=CACHE_TTLS.get("projects", 0))
+    if res.status_code != 200:
+        raise GitLabAPIError(path, res)
+    return res.json()
+
+def _iter_events(path, after_date, since=None, start=None, on_page=None):
+    """Yield events from an events endpoint newest first, stopping at the `after_date` cutoff
+
+    With `since` (an ISO timestamp), stop as soon as events get older than it, so
+    an incremental run only downloads what happened after the previous one.
+    `start` and `on_page` checkpoint the pagination as in iter_pages.
+    """
+    query_after = after_date
+    if since:
+        # `after` only takes a date and is exclusive; the day before `since` keeps it in range
+        since_day = (date.fromisoformat(since[:10]) - timedelta(days=1)).isoformat()
+        query_after = max(after_date, since_day)
+    params = {"after": query_after, "sort": "desc"}
+    for fields in iter_items(path, params, decoder=_event_decoder, start=start, on_page=on_page):
+        event = Event(**fields)
+        # created_at is an ISO timestamp, so comparing its date prefix is enough
+        if event.created_at[:10] <= after_date:
+            return
+        if since and event.created_at < since:
+            return
+        yield event
+
+def iter_project_events(project_id, after_date, since=None, start=None, on_page=None):
+    """Yield a project's events newest first; see _iter_events for the cutoffs and checkpoints"""
+    return _iter_events(f"/projects/{project_id}/events", after_date, since, start, on_page)
+
+def iter_user_events(user_id, after_date):
+    """Yield a user's events across every project the token can see, newest first
+
+    Users with a private profile return no events here.
+    """
+    return _iter_events(f"/users/{user_id}/events", after_date)
+
+def iter_projects(params=None):
+    """Yield accessible projects using keyset pagination, which /projects supports natively"""
+    params = dict(params or {}, pagination="keyset", order_by="id", sort="asc")
+    return iter_items("/projects", params, cache_ttl=CACHE_TTLS.get("projects", 0))
+
+def iter_group_projects(group, include_subgroups=False):
+    """Yield the projects of a group (ID or URL-encoded full path)"""
+    params = {"include_subgroups": "true"} if include_subgroups else None
+    return iter_items(f"/groups/{group}/projects", params, cache_ttl=CACHE_TTLS.get("projects", 0))
@@ -0,0 +1,151 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlencode
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+import config
+import http_client
+import metrics
+
+CACHE_PATH = getattr(config, "HTTP_CACHE_PATH", "cache/http_cache.sqlite3")
+CACHE_MAX_BYTES = getattr(config, "HTTP_CACHE_MAX_MB", 64) * 1024 * 1024
+
+# Response headers worth keeping: pagination needs these to walk cached pages
+KEPT_HEADERS = ("Content-Type", "ETag", "Link", "X-Next-Page", "X-Page", "X-Total", "X-Total-Pages")
+
+class HttpCache:
+    """SQLite-backed response cache keyed by URL+params, evicted least-recently-used first"""
+
+    def __init__(self, path, max_bytes):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        # Sharded crawls write from several processes; wait out their locks
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                etag TEXT,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )"""
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self.db.commit()
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0}
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def get(self, key):
+        """Return (etag, headers, body, fetched_at) for `key`, or None"""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT etag, headers, body, fetched_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.db.commit()
+        etag, headers, body, fetched_at = row
+        return etag, json.loads(headers), body, fetched_at
+
+    def put(self, key, etag, headers, body):
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, etag, json.dumps(headers), body, len(body), now, now),
+            )
+            self._evict()
+            self.db.commit()
+
+    def refresh(self, key):
+        """Mark a cached entry as freshly validated after a 304"""
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                "UPDATE responses SET fetched_at = ?, last_used = ? WHERE key = ?", (now, now, key)
+            )
+            self.db.commit()
+
+    def _evict(self):
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self.db.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    """Return the process-wide cache, opening it on first use"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = HttpCache(CACHE_PATH, CACHE_MAX_BYTES)
+        return _cache
+
+def _cache_key(url, params):
+    if not params:
+        return url
+    return f"{url}?{urlencode(sorted(params.items()))}"
+
+def _build_response(url, headers, body):
+    response = Response()
+    response.status_code = 200
+    response.url = url
+    response.headers = CaseInsensitiveDict(headers)
+    response._content = body
+    return response
+
+def cached_get(url, params=None, ttl=0):
+    """GET through the disk cache: fresh entries skip the network, stale ones are revalidated with If-None-Match"""
+    if ttl <= 0:
+        return http_client.request("GET", url, params=params)
+
+    cache = get_cache()
+    key = _cache_key(url, params)
+    cached = cache.get(key)
+    headers = {}
+    if cached:
+        etag, cached_headers, body, fetched_at = cached
+        if time.time() - fetched_at < ttl:
+            cache.count("hits")
+            metrics.record_request("GET", url, 200, 0.0, 0, cache="hit")
+            return _build_response(url, cached_headers, body)
+        if etag:
+            headers["If-None-Match"] = etag
+
+    res = http_client.request("GET", url, params=params, headers=headers, cache="miss")
+    if res.status_code == 304 and cached:
+        cache.count("revalidated")
+        cache.refresh(key)
+        return _build_response(url, cached_headers, body)
+
+    cache.count("misses")
+    if res.status_code == 200:
+        kept = {name: res.headers[name] for name in KEPT_HEADERS if name in res.headers}
+        cache.put(key, res.headers.get("ETag"), kept, res.content)
+    return res
+
+def get_stats():
+    """Return hit, revalidation and miss counters for this process"""
+    if _cache is None:
+        return {"hits": 0, "revalidated": 0, "misses": 0}
+    with _cache.lock:
+        return dict(_cache.stats)
@@ -0,0 +1,217 @@
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import EmptyPoolError
+import config
+import crawl_budget
+import metrics
+from rate_limit import RateLimiter
+
+# (connect, read) timeouts in seconds; no call may hang forever
+TIMEOUT = (
+    getattr(config, "HTTP_CONNECT_TIMEOUT", 5),
+    getattr(config, "HTTP_READ_TIMEOUT", 30),
+)
+
+# Keep-alive connections kept open per host
+POOL_SIZE = getattr(config, "HTTP_POOL_SIZE", 16)
+
+# Seconds to wait for a free pooled connection before giving up (and retrying)
+POOL_TIMEOUT = getattr(config, "HTTP_POOL_TIMEOUT", 30)
+
+# Upper bound on concurrent requests to any single host, however many crawl threads run
+MAX_IN_FLIGHT_PER_HOST = getattr(config, "MAX_IN_FLIGHT_PER_HOST", 8)
+
+# Sustained request rate and burst allowed per host, before RateLimit-* headers adjust it
+REQUESTS_PER_SECOND = getattr(config, "REQUESTS_PER_SECOND", 20)
+REQUEST_BURST = getattr(config, "REQUEST_BURST", 20)
+
+# Retries for 429s, 5xx on idempotent requests and connection errors
+MAX_RETRIES = getattr(config, "MAX_RETRIES", 5)
+BACKOFF_BASE = getattr(config, "BACKOFF_BASE", 1.0)
+BACKOFF_MAX = getattr(config, "BACKOFF_MAX", 60.0)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+_sessions = {}
+_host_slots = {}
+_limiters = {}
+_lock = threading.Lock()
+
+class _BoundedWait:
+    """Waits at most POOL_TIMEOUT for a pooled connection; requests never passes a pool timeout"""
+
+    def _get_conn(self, timeout=None):
+        return super()._get_conn(timeout=POOL_TIMEOUT if timeout is None else timeout)
+
+class _BoundedHTTPPool(_BoundedWait, HTTPConnectionPool):
+    pass
+
+class _BoundedHTTPSPool(_BoundedWait, HTTPSConnectionPool):
+    pass
+
+class _PoolAdapter(HTTPAdapter):
+    """A blocking keep-alive pool whose waits for a free connection time out"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _BoundedHTTPPool, "https": _BoundedHTTPSPool}
+
+    def send(self, request, **kwargs):
+        try:
+            return super().send(request, **kwargs)
+        except EmptyPoolError as error:
+            raise requests.ConnectionError(error, request=request)
+
+def _build_session(headers):
+    session = requests.Session()
+    adapter = _PoolAdapter(pool_connections=4, pool_maxsize=POOL_SIZE, pool_block=True)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+    session.headers.update(headers)
+    return session
+
+def get_session(name="gitlab"):
+    """Return the shared keep-alive session for `name` ("gitlab" or "graph")"""
+    with _lock:
+        if name not in _sessions:
+            headers = config.HEADERS if name == "gitlab" else {}
+            _sessions[name] = _build_session(headers)
+        return _sessions[name]
+
+def _host_slot(url):
+    """Return the semaphore that bounds in-flight requests to the host of `url`"""
+    host = urlsplit(url).netloc
+    with _lock:
+        if host not in _host_slots:
+            _host_slots[host] = threading.BoundedSemaphore(MAX_IN_FLIGHT_PER_HOST)
+        return _host_slots[host]
+
+def _limiter(url):
+    """Return the rate limiter for the host of `url`"""
+    host = urlsplit(url).netloc
+    with _lock:
+        if host not in _limiters:
+            _limiters[host] = RateLimiter(
+                REQUESTS_PER_SECOND, REQUEST_BURST, MAX_RETRIES, BACKOFF_BASE, BACKOFF_MAX
+            )
+        return _limiters[host]
+
+def _should_retry(method, response):
+    if response.status_code == 429:
+        # The server rejected the request outright, so resending cannot duplicate it
+        return True
+    return response.status_code in RETRY_STATUSES and method.upper() in IDEMPOTENT_METHODS
+
+def _response_size(response):
+    """Bytes on the wire when the server says so, else the decoded body size"""
+    length = response.headers.get("Content-Length")
+    if length and length.isdigit():
+        return int(length)
+    return len(response.content)
+
+def _record_when_closed(response, record):
+    """Defer recording a streamed response until it is closed, when the bytes read are known
+
+    Streamed pages may carry no Content-Length, so the size is urllib3's count
+    of wire bytes read, or for chunked bodies (which urllib3 does not count)
+    the bytes handed out by iter_content; either way less than the whole body
+    if the reader stopped early.
+    """
+    close = response.close
+    iter_content = response.iter_content
+    read = [0]
+
+    def counted_iter_content(*args, **kwargs):
+        for chunk in iter_content(*args, **kwargs):
+            read[0] += len(chunk)
+            yield chunk
+
+    def close_and_record():
+        if response.close is close_and_record:
+            response.close = close
+            record(response.raw.tell() or read[0])
+        close()
+
+    response.iter_content = counted_iter_content
+    response.close = close_and_record
+
+def _capped_timeout(timeout, deadline):
+    """The (connect, read) timeouts, shortened so neither outlasts `deadline`"""
+    if deadline is None or timeout is None:
+        return timeout
+    connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+    left = max(deadline.left(), 0.001)
+    return min(connect, left), min(read, left)
+
+def request(method, url, session="gitlab", cache=None, deadline=None, **kwargs):
+    """Send a request through a pooled session with pacing, retries and a default timeout
+
+    Every call is recorded in metrics; `cache` tags calls made on behalf of the
+    HTTP cache ("miss", or "revalidated" when the server answers 304).
+    `deadline` (a crawl_budget.Deadline, by default the one applied to this
+    thread) caps every wait and timeout; BudgetExceeded is raised rather than
+    waiting past it.
+    """
+    deadline = deadline or crawl_budget.current_deadline()
+    timeout = kwargs.pop("timeout", TIMEOUT)
+    limiter = _limiter(url)
+    attempt = 0
+    started = time.perf_counter()
+    while True:
+        limiter.wait(deadline)
+        if deadline:
+            deadline.check()
+        try:
+            with _host_slot(url):
+                response = get_session(session).request(
+                    method, url, timeout=_capped_timeout(timeout, deadline), **kwargs
+                )
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt >= MAX_RETRIES or method.upper() not in IDEMPOTENT_METHODS:
+                metrics.record_request(method, url, None, time.perf_counter() - started, 0, attempt, cache)
+                raise
+            limiter.backoff(attempt, deadline=deadline)
+            attempt += 1
+            continue
+        limiter.observe(response)
+        if attempt >= MAX_RETRIES or not _should_retry(method, response):
+            if cache and response.status_code == 304:
+                cache = "revalidated"
+            seconds = time.perf_counter() - started
+            if kwargs.get("stream", False):
+                _record_when_closed(response, lambda size: metrics.record_request(
+                    method, url, response.status_code, seconds, size, attempt, cache,
+                ))
+            else:
+                metrics.record_request(
+                    method, url, response.status_code, seconds, _response_size(response), attempt, cache,
+                )
+            return response
+        # A streamed body holds its pooled connection until it is read or closed
+        response.close()
+        limiter.backoff(attempt, response, deadline)
+        attempt += 1
+
+def get_stats():
+    """Return request, retry and throttling counters summed over every host"""
+    totals = {"requests": 0, "retries": 0, "rate_limited": 0, "throttled_seconds": 0.0}
+    with _lock:
+        limiters = list(_limiters.values())
+    for limiter in limiters:
+        with limiter.lock:
+            for key in totals:
+                totals[key] += limiter.stats[key]
+    return totals
+
+def close_sessions():
+    """Close every pooled session, e.g. at interpreter shutdown"""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
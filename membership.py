@@ -0,0 +1,86 @@
+import threading
+from concurrent.futures import Future
+from gitlab_api import get_project, iter_group_members, iter_project_members
+
+# Only these member fields are read by the report
+USER_FIELDS = ("id", "username", "name")
+
+class SingleFlight:
+    """Runs each keyed call once; concurrent and later callers for the same key share its outcome"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.executed = 0
+
+    def do(self, key, func, *args):
+        with self.lock:
+            future = self.calls.get(key)
+            owner = future is None
+            if owner:
+                future = self.calls[key] = Future()
+                self.executed += 1
+        if owner:
+            try:
+                future.set_result(func(*args))
+            except BaseException as e:
+                future.set_exception(e)
+        return future.result()
+
+class MembershipResolver:
+    """Resolves project members from direct memberships plus each group's members, fetched once per group
+
+    Every user is interned once in `users`, so member lists of different
+    projects share the same records.
+    """
+
+    def __init__(self):
+        self.flight = SingleFlight()
+        self.lock = threading.Lock()
+        self.users = {}
+
+    def intern(self, member):
+        """Return the registry's record for this member, adding a slim copy the first time"""
+        with self.lock:
+            user = self.users.get(member["id"])
+            if user is None:
+                user = self.users[member["id"]] = {key: member[key] for key in USER_FIELDS}
+            return user
+
+    def _fetch_members(self, members):
+        return [self.intern(member) for member in members]
+
+    def group_members(self, group_id):
+        return self.flight.do(
+            ("group", group_id), lambda: self._fetch_members(iter_group_members(group_id))
+        )
+
+    def project_groups(self, project):
+        """IDs of the groups a project inherits members from: its namespace's and the groups it's shared with"""
+        details = project if "namespace" in project else self.flight.do(
+            ("project", project["id"]), get_project, project["id"]
+        )
+        group_ids = []
+        namespace = details.get("namespace") or {}
+        if namespace.get("kind") == "group":
+            group_ids.append(namespace["id"])
+        group_ids += [shared["group_id"] for shared in details.get("shared_with_groups", [])]
+        return group_ids
+
+    def project_members(self, project):
+        """Direct members first, then inherited ones, each user once (like /members/all)"""
+        direct = self.flight.do(
+            ("project", project["id"], "members"),
+            lambda: self._fetch_members(iter_project_members(project["id"], inherited=False)),
+        )
+        members = list(direct)
+        seen = {member["id"] for member in members}
+        for group_id in self.project_groups(project):
+            for member in self.group_members(group_id):
+                if member["id"] not in seen:
+                    seen.add(member["id"])
+                    members.append(member)
+        return members
+
+    def get_stats(self):
+        return {"fetches": self.flight.executed, "users": len(self.users)}
@@ -0,0 +1,220 @@
+import json
+import math
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+import config
+
+# One JSON object per API call; set to None to disable
+METRICS_LOG_PATH = getattr(config, "METRICS_LOG_PATH", "logs/api_requests.jsonl")
+
+# Optional Prometheus/OpenMetrics textfile, e.g. for node_exporter's textfile collector
+METRICS_PROMETHEUS_PATH = getattr(config, "METRICS_PROMETHEUS_PATH", None)
+
+# Path segments that follow these are identifiers, not part of the endpoint
+ID_PARENTS = {"projects", "groups", "users"}
+
+_lock = threading.Lock()
+_log_file = None
+_run = {}
+
+def endpoint_template(url):
+    """Collapse IDs in a URL path, e.g. /api/v4/projects/123/events -> /projects/:id/events"""
+    path = urlsplit(url).path
+    path = re.sub(r"^/api/v\d+", "", path)
+    segments = path.split("/")
+    for i in range(1, len(segments)):
+        if segments[i - 1] in ID_PARENTS and segments[i]:
+            segments[i] = ":id"
+    return "/".join(segments)
+
+def start_run(run_id=None):
+    """Reset the per-run aggregates; called at the start of every report run"""
+    with _lock:
+        _run.clear()
+        _run.update({
+            "id": run_id or datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+            "started": time.perf_counter(),
+            "endpoints": {},
+            "projects": {},
+            "cache": {"hit": 0, "miss": 0, "revalidated": 0},
+        })
+
+def _write_log(record):
+    global _log_file
+    if not METRICS_LOG_PATH:
+        return
+    if _log_file is None:
+        directory = os.path.dirname(METRICS_LOG_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        _log_file = open(METRICS_LOG_PATH, "a", buffering=1)
+    _log_file.write(json.dumps(record) + "\n")
+
+def record_request(method, url, status, seconds, size, retries=0, cache=None):
+    """Record one logical API call (after retries) to the JSON-lines log and run aggregates"""
+    endpoint = endpoint_template(url)
+    record = {
+        "ts": datetime.now().isoformat(timespec="milliseconds"),
+        "run": _run.get("id"),
+        "method": method.upper(),
+        "endpoint": endpoint,
+        "status": status,
+        "latency_ms": round(seconds * 1000, 1),
+        "bytes": size,
+        "retries": retries,
+        "cache": cache,
+    }
+    with _lock:
+        _write_log(record)
+        if not _run:
+            return
+        if cache:
+            _run["cache"][cache] += 1
+        if cache == "hit":
+            # Served from disk; keep it out of the network latency figures
+            return
+        stats = _run["endpoints"].setdefault(
+            endpoint, {"latencies": [], "bytes": 0, "errors": 0, "retries": 0}
+        )
+        stats["latencies"].append(seconds)
+        stats["bytes"] += size or 0
+        stats["retries"] += retries
+        if status is None or status >= 400:
+            stats["errors"] += 1
+
+def record_project(project_name, seconds):
+    """Add time spent fetching for one project (members and events are summed)"""
+    with _lock:
+        if _run:
+            _run["projects"][project_name] = _run["projects"].get(project_name, 0.0) + seconds
+
+def run_id():
+    """Return the current run's ID; worker processes log under the same one"""
+    return _run.get("id")
+
+def export_run():
+    """Return this process's raw run aggregates, for a parent process to merge_run()"""
+    with _lock:
+        return {
+            "endpoints": _run.get("endpoints", {}),
+            "projects": _run.get("projects", {}),
+            "cache": _run.get("cache", {}),
+        }
+
+def merge_run(partial):
+    """Fold another process's export_run() into this run, so percentiles cover every call"""
+    with _lock:
+        if not _run:
+            return
+        for endpoint, other in partial["endpoints"].items():
+            stats = _run["endpoints"].setdefault(
+                endpoint, {"latencies": [], "bytes": 0, "errors": 0, "retries": 0}
+            )
+            stats["latencies"].extend(other["latencies"])
+            for key in ("bytes", "errors", "retries"):
+                stats[key] += other[key]
+        for project_name, seconds in partial["projects"].items():
+            _run["projects"][project_name] = _run["projects"].get(project_name, 0.0) + seconds
+        for result, count in partial["cache"].items():
+            _run["cache"][result] += count
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+def summarize():
+    """Return the run's per-endpoint latency percentiles, cache counters and slowest projects"""
+    with _lock:
+        endpoints = {
+            endpoint: {
+                "count": len(stats["latencies"]),
+                "p50_ms": percentile(stats["latencies"], 0.5) * 1000,
+                "p95_ms": percentile(stats["latencies"], 0.95) * 1000,
+                "bytes": stats["bytes"],
+                "errors": stats["errors"],
+                "retries": stats["retries"],
+            }
+            for endpoint, stats in _run.get("endpoints", {}).items()
+            if stats["latencies"]
+        }
+        slowest = sorted(_run.get("projects", {}).items(), key=lambda item: -item[1])
+        return {
+            "run": _run.get("id"),
+            "seconds": time.perf_counter() - _run["started"] if _run else 0.0,
+            "endpoints": endpoints,
+            "cache": dict(_run.get("cache", {})),
+            "slowest_projects": slowest[:5],
+        }
+
+def print_summary(summary=None):
+    summary = summary or summarize()
+    print(f"\n⏱️ Run took {summary['seconds']:.1f}s")
+    print(f"  {'endpoint':<32} {'calls':>6} {'p50 ms':>8} {'p95 ms':>8} {'KB':>8} {'errors':>6}")
+    for endpoint, stats in sorted(summary["endpoints"].items(), key=lambda item: -item[1]["count"]):
+        print(f"  {endpoint:<32} {stats['count']:>6} {stats['p50_ms']:>8.0f} {stats['p95_ms']:>8.0f} "
+              f"{stats['bytes'] / 1024:>8.1f} {stats['errors']:>6}")
+    if summary["slowest_projects"]:
+        print("  🐢 Slowest projects:")
+        for project_name, seconds in summary["slowest_projects"]:
+            print(f"    - {project_name}: {seconds:.2f}s")
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+def write_prometheus(summary=None, path=None):
+    """Write the run summary as a Prometheus textfile (written atomically)"""
+    path = path or METRICS_PROMETHEUS_PATH
+    if not path:
+        return
+    summary = summary or summarize()
+    lines = [
+        "# HELP gitlab_monitor_run_seconds Duration of the last report run.",
+        "# TYPE gitlab_monitor_run_seconds gauge",
+        f"gitlab_monitor_run_seconds {summary['seconds']:.3f}",
+        "# HELP gitlab_monitor_requests Calls per endpoint in the last run.",
+        "# TYPE gitlab_monitor_requests gauge",
+    ]
+    for endpoint, stats in summary["endpoints"].items():
+        lines.append(f'gitlab_monitor_requests{{endpoint="{_label(endpoint)}"}} {stats["count"]}')
+    lines += [
+        "# HELP gitlab_monitor_request_latency_seconds Request latency quantiles in the last run.",
+        "# TYPE gitlab_monitor_request_latency_seconds gauge",
+    ]
+    for endpoint, stats in summary["endpoints"].items():
+        for quantile, key in (("0.5", "p50_ms"), ("0.95", "p95_ms")):
+            lines.append(
+                f'gitlab_monitor_request_latency_seconds{{endpoint="{_label(endpoint)}",quantile="{quantile}"}} '
+                f"{stats[key] / 1000:.4f}"
+            )
+    lines += [
+        "# HELP gitlab_monitor_response_bytes Response bytes per endpoint in the last run.",
+        "# TYPE gitlab_monitor_response_bytes gauge",
+    ]
+    for endpoint, stats in summary["endpoints"].items():
+        lines.append(f'gitlab_monitor_response_bytes{{endpoint="{_label(endpoint)}"}} {stats["bytes"]}')
+    lines += [
+        "# HELP gitlab_monitor_retries Retries per endpoint in the last run.",
+        "# TYPE gitlab_monitor_retries gauge",
+    ]
+    for endpoint, stats in summary["endpoints"].items():
+        lines.append(f'gitlab_monitor_retries{{endpoint="{_label(endpoint)}"}} {stats["retries"]}')
+    lines += [
+        "# HELP gitlab_monitor_cache_lookups HTTP cache results in the last run.",
+        "# TYPE gitlab_monitor_cache_lookups gauge",
+    ]
+    for result, count in summary["cache"].items():
+        lines.append(f'gitlab_monitor_cache_lookups{{result="{result}"}} {count}')
+    lines.append("# EOF")
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
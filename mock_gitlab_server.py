@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+ACTIONS = ["pushed to", "pushed new", "opened", "accepted", "commented on", "closed"]
+
+# What the events API reports as target_type for each action; pushes have none
+TARGET_TYPES = {"opened": "MergeRequest", "accepted": "MergeRequest", "commented on": "Note", "closed": "Issue"}
+
+class MockGitLab:
+    """Synthetic GitLab data plus request/byte counters for the mock server"""
+
+    def __init__(self, projects=7, members=30, events=500, days=10, max_page_size=100,
+                 latency=0.0, error_rate=0.0, seed=1, groups=1):
+        rng = random.Random(seed)
+        now = datetime.now(timezone.utc)
+        self.max_page_size = max_page_size
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rng = rng
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "bytes": 0, "throttled": 0, "not_modified": 0}
+
+        users = [
+            {"id": 1000 + i, "username": f"dev{i}", "name": f"Developer {i}", "state": "active"}
+            for i in range(max(members, 1) * 2)
+        ]
+        members = min(max(members, 1), len(users))
+        # Projects are spread over `groups` groups; two thirds of each project's members
+        # are inherited from its group and the rest are direct project members
+        self.group_members = {
+            10 + g: rng.sample(users, members * 2 // 3) for g in range(max(groups, 1))
+        }
+        self.projects = []
+        self.members = {}
+        self.direct_members = {}
+        self.events = {}
+        event_id = 1
+        for p in range(projects):
+            project_id = 100 + p
+            group_id = 10 + p % len(self.group_members)
+            self.projects.append({
+                "id": project_id,
+                "name": f"project-{p}",
+                "path_with_namespace": f"group-{group_id}/project-{p}",
+                "namespace": {"id": group_id, "kind": "group", "full_path": f"group-{group_id}"},
+                "shared_with_groups": [],
+            })
+            inherited = self.group_members[group_id]
+            others = [user for user in users if user not in inherited]
+            self.direct_members[project_id] = rng.sample(others, members - len(inherited))
+            self.members[project_id] = self.direct_members[project_id] + inherited
+            project_events = []
+            for _ in range(events):
+                author = rng.choice(self.members[project_id])
+                created = now - timedelta(seconds=rng.randint(0, days * 86400))
+                action_name = rng.choice(ACTIONS)
+                push_data = {"commit_count": rng.randint(1, 5), "ref": "main", "commit_title": "x" * 60}
+                project_events.append({
+                    "id": event_id,
+                    "project_id": project_id,
+                    "action_name": action_name,
+                    "target_id": None,
+                    "target_type": TARGET_TYPES.get(action_name),
+                    "author_id": author["id"],
+                    "created_at": created.strftime("%Y-%m-%dT%H:%M:%S.") + f"{created.microsecond // 1000:03d}Z",
+                    "author": author,
+                    "push_data": push_data if action_name.startswith("pushed") else None,
+                })
+                event_id += 1
+            project_events.sort(key=lambda e: (e["created_at"], e["id"]), reverse=True)
+            self.events[project_id] = project_events
+        self.user_events = {}
+        for project_events in self.events.values():
+            for event in project_events:
+                self.user_events.setdefault(event["author_id"], []).append(event)
+        for events_of_user in self.user_events.values():
+            events_of_user.sort(key=lambda e: (e["created_at"], e["id"]), reverse=True)
+
+    def count(self, key, amount=1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def reset_stats(self):
+        with self.lock:
+            for key in self.stats:
+                self.stats[key] = 0
+
+    def resolve(self, path, query):
+        """Return the full item list for an API path, or None if unknown"""
+        match = re.fullmatch(r"/api/v4/projects/(\d+)/(members/all|members|events)", path)
+        if match:
+            project_id = int(match.group(1))
+            if project_id not in self.members:
+                return None
+            if match.group(2) == "members/all":
+                return self.members[project_id]
+            if match.group(2) == "members":
+                return self.direct_members[project_id]
+            return self._filter_events(self.events[project_id], query)
+        match = re.fullmatch(r"/api/v4/groups/(\d+)/members/all", path)
+        if match:
+            return self.group_members.get(int(match.group(1)))
+        match = re.fullmatch(r"/api/v4/users/(\d+)/events", path)
+        if match:
+            return self._filter_events(self.user_events.get(int(match.group(1)), []), query)
+        if path == "/api/v4/projects" or re.fullmatch(r"/api/v4/groups/[^/]+/projects", path):
+            return self.projects
+        return None
+
+    def _filter_events(self, events, query):
+        after = query.get("after")
+        if after:
+            events = [e for e in events if e["created_at"][:10] > after]
+        if query.get("sort") == "asc":
+            events = events[::-1]
+        return events
+
+class MockGitLabHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Send each keep-alive response at once rather than waiting on the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        gitlab = self.server.gitlab
+        gitlab.count("requests")
+        if gitlab.latency:
+            time.sleep(gitlab.latency)
+        if gitlab.error_rate and gitlab.rng.random() < gitlab.error_rate:
+            gitlab.count("throttled")
+            return self._send(429, b"", {"Retry-After": "0", "RateLimit-Remaining": "0",
+                                         "RateLimit-Reset": str(int(time.time()))})
+
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if url.path == "/api/v4/user":
+            return self._send_json({"id": 1, "name": "Benchmark", "username": "benchmark"})
+        match = re.fullmatch(r"/api/v4/projects/(\d+)", url.path)
+        if match:
+            project = next((p for p in gitlab.projects if p["id"] == int(match.group(1))), None)
+            if project is None:
+                return self._send_json({"message": "404 Project Not Found"}, status=404)
+            return self._send_json(project)
+        items = gitlab.resolve(url.path, query)
+        if items is None:
+            return self._send_json({"message": "404 Not Found"}, status=404)
+
+        per_page = min(int(query.get("per_page", 20)), gitlab.max_page_size)
+        page = int(query.get("page", 1))
+        chunk = items[(page - 1) * per_page:page * per_page]
+        headers = {"X-Page": str(page), "X-Per-Page": str(per_page), "X-Total": str(len(items)),
+                   "X-Next-Page": str(page + 1) if page * per_page < len(items) else ""}
+        body = json.dumps(chunk).encode()
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        headers["ETag"] = etag
+        if self.headers.get("If-None-Match") == etag:
+            gitlab.count("not_modified")
+            return self._send(304, b"", headers)
+        self._send(200, body, headers)
+
+    def _send_json(self, obj, status=200):
+        self._send(status, json.dumps(obj).encode())
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.gitlab.count("bytes", len(body))
+
+def start_server(gitlab, host="127.0.0.1", port=0):
+    """Serve `gitlab` on a background thread; returns (server, base_url)"""
+    server = ThreadingHTTPServer((host, port), MockGitLabHandler)
+    server.daemon_threads = True
+    server.gitlab = gitlab
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+def main():
+    """Run the mock server in the foreground"""
+    parser = argparse.ArgumentParser(description="Local stand-in for the GitLab REST API")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--projects", type=int, default=7)
+    parser.add_argument("--members", type=int, default=30)
+    parser.add_argument("--groups", type=int, default=1)
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    args = parser.parse_args()
+
+    gitlab = MockGitLab(args.projects, args.members, args.events, max_page_size=args.page_size,
+                        latency=args.latency, error_rate=args.error_rate, groups=args.groups)
+    server, base_url = start_server(gitlab, port=args.port)
+    print(f"🧪 Mock GitLab listening on {base_url}/api/v4 with {args.projects} projects")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
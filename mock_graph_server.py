@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+
+import argparse
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+class MockGraph:
+    """Records what the Graph mail endpoints would have sent, plus request/token counters"""
+
+    def __init__(self, token_lifetime=3600, throttle_rate=0.0, seed=1):
+        self.token_lifetime = token_lifetime
+        self.throttle_rate = throttle_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.tokens = {}
+        self.drafts = {}
+        self.uploads = {}
+        self.sent = []
+        self.stats = {"requests": 0, "token_requests": 0, "batches": 0, "throttled": 0, "upload_chunks": 0}
+
+    def count(self, key, amount=1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def issue_token(self):
+        token = f"mock-token-{next(self.ids)}"
+        with self.lock:
+            self.tokens[token] = time.time() + self.token_lifetime
+        return {"token_type": "Bearer", "expires_in": self.token_lifetime, "access_token": token}
+
+    def authorized(self, header):
+        token = (header or "").removeprefix("Bearer ")
+        with self.lock:
+            return self.tokens.get(token, 0) > time.time()
+
+    def expire_tokens(self):
+        """Make every issued token invalid, as if they had all run out"""
+        with self.lock:
+            self.tokens.clear()
+
+    def record(self, sender, message):
+        with self.lock:
+            self.sent.append({
+                "from": sender,
+                "to": [r["emailAddress"]["address"] for r in message.get("toRecipients", [])],
+                "subject": message.get("subject"),
+                "attachments": [(a["name"], len(a.get("contentBytes", ""))) for a in message.get("attachments", [])],
+            })
+
+    def handle(self, method, path, body, base_url):
+        """Serve one mail API call; returns (status, response body, headers)"""
+        match = re.fullmatch(r"/users/([^/]+)/sendMail", path)
+        if method == "POST" and match:
+            if self.throttle_rate and self.rng.random() < self.throttle_rate:
+                self.count("throttled")
+                return 429, {"error": {"code": "TooManyRequests", "message": "throttled"}}, {"Retry-After": "0"}
+            self.record(unquote(match.group(1)), body["message"])
+            return 202, None, {}
+        match = re.fullmatch(r"/users/([^/]+)/messages", path)
+        if method == "POST" and match:
+            message_id = f"draft-{next(self.ids)}"
+            with self.lock:
+                self.drafts[message_id] = (unquote(match.group(1)), body)
+            return 201, {"id": message_id}, {}
+        match = re.fullmatch(r"/users/[^/]+/messages/([^/]+)/attachments/createUploadSession", path)
+        if method == "POST" and match and match.group(1) in self.drafts:
+            item = body["AttachmentItem"]
+            session_id = f"upload-{next(self.ids)}"
+            with self.lock:
+                self.uploads[session_id] = {"message": match.group(1), "name": item["name"],
+                                            "size": item["size"], "received": bytearray()}
+            return 201, {"uploadUrl": f"{base_url}/upload/{session_id}"}, {}
+        match = re.fullmatch(r"/users/[^/]+/messages/([^/]+)/send", path)
+        if method == "POST" and match and match.group(1) in self.drafts:
+            with self.lock:
+                sender, message = self.drafts.pop(match.group(1))
+                uploaded = [u for u in self.uploads.values() if u["message"] == match.group(1)]
+            message = dict(message, attachments=message.get("attachments", []) + [
+                {"name": u["name"], "contentBytes": "x" * len(u["received"])} for u in uploaded
+            ])
+            self.record(sender, message)
+            return 202, None, {}
+        return 404, {"error": {"code": "NotFound", "message": path}}, {}
+
+class MockGraphHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Send each keep-alive response at once rather than waiting on the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _read_body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_POST(self):
+        graph = self.server.graph
+        graph.count("requests")
+        path = urlsplit(self.path).path
+        raw = self._read_body()
+        if path.endswith("/oauth2/v2.0/token"):
+            graph.count("token_requests")
+            return self._send_json(200, graph.issue_token())
+        if not path.startswith("/v1.0/"):
+            return self._send_json(404, {"error": {"code": "NotFound", "message": path}})
+        if not graph.authorized(self.headers.get("Authorization")):
+            return self._send_json(401, {"error": {"code": "InvalidAuthenticationToken",
+                                                   "message": "Access token has expired or is not yet valid."}})
+        body = json.loads(raw) if raw else {}
+        path = path[len("/v1.0"):]
+        if path == "/$batch":
+            graph.count("batches")
+            requests = body["requests"]
+            if len(requests) > 20:
+                return self._send_json(400, {"error": {"code": "BadRequest", "message": "more than 20 requests"}})
+            responses = []
+            for request in requests:
+                status, response_body, headers = graph.handle(request["method"], request["url"],
+                                                              request.get("body"), self.server.base_url)
+                responses.append({"id": request["id"], "status": status, "headers": headers,
+                                  "body": response_body})
+            return self._send_json(200, {"responses": responses})
+        status, response_body, headers = graph.handle("POST", path, body, self.server.base_url)
+        self._send_json(status, response_body, headers)
+
+    def do_PUT(self):
+        graph = self.server.graph
+        graph.count("requests")
+        match = re.fullmatch(r"/upload/([^/]+)", urlsplit(self.path).path)
+        chunk = self._read_body()
+        upload = graph.uploads.get(match.group(1)) if match else None
+        if upload is None:
+            return self._send_json(404, {"error": {"code": "NotFound", "message": self.path}})
+        if self.headers.get("Authorization"):
+            return self._send_json(401, {"error": {"code": "InvalidAuthenticationToken",
+                                                   "message": "upload URLs take no Authorization header"}})
+        graph.count("upload_chunks")
+        start = int(re.match(r"bytes (\d+)-", self.headers["Content-Range"]).group(1))
+        if start != len(upload["received"]):
+            return self._send_json(416, {"error": {"code": "InvalidRange", "message": "unexpected range"}})
+        upload["received"] += chunk
+        if len(upload["received"]) >= upload["size"]:
+            return self._send_json(201, {})
+        self._send_json(200, {"nextExpectedRanges": [f"{len(upload['received'])}-"]})
+
+    def _send_json(self, status, obj, headers=None):
+        body = b"" if obj is None else json.dumps(obj).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+def start_server(graph, host="127.0.0.1", port=0):
+    """Serve `graph` on a background thread; returns (server, base_url)
+
+    Point GRAPH_AUTHORITY_URL at base_url and GRAPH_API_URL at base_url + "/v1.0".
+    """
+    server = ThreadingHTTPServer((host, port), MockGraphHandler)
+    server.daemon_threads = True
+    server.graph = graph
+    server.base_url = f"http://{host}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.base_url
+
+def main():
+    """Run the mock server in the foreground"""
+    parser = argparse.ArgumentParser(description="Local stand-in for the Microsoft Graph mail API")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--token-lifetime", type=int, default=3600, help="seconds each access token lasts")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of sendMail calls answered with 429")
+    args = parser.parse_args()
+
+    graph = MockGraph(args.token_lifetime, args.throttle_rate)
+    server, base_url = start_server(graph, port=args.port)
+    print(f"🧪 Mock Graph listening on {base_url} (GRAPH_API_URL = {base_url}/v1.0)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
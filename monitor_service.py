@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import config
+from config import FROM_EMAIL, EMAIL_PASSWORD, TO_EMAIL, get_email_body, get_email_subject
+from email_payload import summary_html
+from gitlab import WEBHOOK_INGEST, build_reports, format_coverage
+from send_email_smtp import Delivery, send_batch, send_email_smtp
+from webhook_receiver import start_webhook_server
+
+# Daily run time (local, HH:MM) whose report is emailed; None disables it
+DAILY_AT = getattr(config, "SERVICE_DAILY_AT", "20:00")
+
+# Also refresh the report every hour (not emailed); keeps the stores and caches current
+HOURLY = getattr(config, "SERVICE_HOURLY", False)
+
+# Health/status endpoint; set the port to None to disable it
+STATUS_HOST = getattr(config, "SERVICE_STATUS_HOST", "127.0.0.1")
+STATUS_PORT = getattr(config, "SERVICE_STATUS_PORT", 8081)
+
+# `--once` exit statuses: the wrapper script resumes a failed crawl, but must not
+# rerun (and re-mail) a report that was built and only failed to go out
+EXIT_OK = 0
+EXIT_CRAWL_FAILED = 1
+EXIT_DELIVERY_FAILED = 2
+
+class MonitorService:
+    """Runs reports on an internal schedule in one long-lived process
+
+    HTTP sessions, the HTTP cache and the activity store stay open between
+    runs, and the email is sent in-process right after the report.
+    """
+
+    def __init__(self, daily_at=DAILY_AT, hourly=HOURLY, email=True):
+        self.daily_at = daily_at
+        self.hourly = hourly
+        self.email = email
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.status = {
+            "state": "idle",
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "runs": 0,
+            "next_run": None,
+            "last_run": None,
+        }
+
+    def next_run(self, now):
+        """Return (when, send_email) for the next scheduled run after `now`"""
+        candidates = []
+        if self.daily_at:
+            hour, minute = map(int, self.daily_at.split(":"))
+            daily = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            if daily <= now:
+                daily += timedelta(days=1)
+            candidates.append((daily, True))
+        if self.hourly:
+            hourly = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+            candidates.append((hourly, False))
+        if not candidates:
+            raise ValueError("Nothing scheduled: set SERVICE_DAILY_AT and/or SERVICE_HOURLY")
+        # A daily run that coincides with an hourly one wins, so the email still goes out
+        return min(candidates, key=lambda candidate: (candidate[0], not candidate[1]))
+
+    def run_once(self, send_email=True, resume=False):
+        """Generate (or with `resume`, finish) a report, optionally email it, and record the outcome
+
+        Returns EXIT_OK, EXIT_CRAWL_FAILED when no report was built, or
+        EXIT_DELIVERY_FAILED when the report was built but not all of it was sent.
+        """
+        started = time.perf_counter()
+        started_at = datetime.now()
+        with self.lock:
+            self.status["state"] = "running"
+        result = {"started_at": started_at.isoformat(timespec="seconds"), "report": None,
+                  "recipient_reports": {}, "coverage": None, "email_sent": None, "error": None}
+        outcome = EXIT_OK
+        try:
+            result["report"], result["recipient_reports"], result["coverage"] = build_reports(resume)
+        except Exception as e:
+            traceback.print_exc()
+            result["error"] = f"{type(e).__name__}: {e}"
+            outcome = EXIT_CRAWL_FAILED
+        if outcome == EXIT_OK and send_email:
+            try:
+                result["email_sent"] = self.send_report(result["report"], result["recipient_reports"],
+                                                        started_at, result["coverage"])
+            except Exception as e:
+                traceback.print_exc()
+                result["error"] = f"{type(e).__name__}: {e}"
+                result["email_sent"] = False
+            if not result["email_sent"]:
+                outcome = EXIT_DELIVERY_FAILED
+        result["duration_seconds"] = round(time.perf_counter() - started, 1)
+        with self.lock:
+            self.status["state"] = "idle"
+            self.status["runs"] += 1
+            self.status["last_run"] = result
+        print(f"🕒 Run finished in {result['duration_seconds']}s")
+        return outcome
+
+    def send_report(self, report_path, recipient_reports, started_at, coverage=None):
+        """Mail the full report to TO_EMAIL and each filtered report to its recipient; True if all went out"""
+        current_date = started_at.strftime("%Y-%m-%d")
+        subject = get_email_subject(current_date)
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        # Readers should know when some rows are "Incomplete" rather than inactive
+        footer = ""
+        if coverage and coverage["complete"] < coverage["projects"]:
+            footer = f"\n\nCoverage: {format_coverage(coverage)}"
+        if not recipient_reports:
+            body = get_email_body(current_date, timestamp, report_path) + footer
+            print(f"Sending email with attachment: {report_path}")
+            return send_email_smtp(FROM_EMAIL, EMAIL_PASSWORD, TO_EMAIL, subject, body, report_path,
+                                   summary_html(report_path, body))
+        reports = {TO_EMAIL: report_path, **recipient_reports}
+        deliveries = []
+        for recipient, path in reports.items():
+            # Each recipient's summary covers only the rows of their own report
+            body = get_email_body(current_date, timestamp, path) + footer
+            deliveries.append(Delivery(recipient, subject, body, (path,), summary_html(path, body)))
+        results = send_batch(FROM_EMAIL, EMAIL_PASSWORD, deliveries)
+        return all(result.sent for result in results)
+
+    def serve_forever(self):
+        """Sleep until each scheduled run, run it, repeat until stopped"""
+        while not self.stop_event.is_set():
+            when, send_email = self.next_run(datetime.now())
+            with self.lock:
+                self.status["next_run"] = when.isoformat(timespec="seconds")
+            print(f"💤 Next run at {when:%Y-%m-%d %H:%M} ({'daily, emailed' if send_email else 'hourly'})")
+            if self.stop_event.wait(max(0.0, (when - datetime.now()).total_seconds())):
+                break
+            self.run_once(send_email and self.email)
+
+    def get_status(self):
+        with self.lock:
+            return json.loads(json.dumps(self.status))
+
+def start_status_server(service, host=STATUS_HOST, port=STATUS_PORT):
+    """Expose GET /health (and /status) as JSON on a background thread"""
+
+    class StatusHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path not in ("/health", "/status"):
+                self.send_response(404)
+                self.end_headers()
+                return
+            status = service.get_status()
+            last_run = status["last_run"]
+            healthy = last_run is None or last_run["error"] is None
+            body = json.dumps(status).encode()
+            self.send_response(200 if healthy else 503)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), StatusHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"🩺 Status endpoint: http://{host}:{server.server_address[1]}/health")
+    return server
+
+def main():
+    """Run as a long-lived service, or once for cron with --once"""
+    parser = argparse.ArgumentParser(description="GitLab monitoring service")
+    parser.add_argument("--once", action="store_true",
+                        help="run one report, email it and exit (1 if the crawl failed, 2 if delivery failed)")
+    parser.add_argument("--no-email", action="store_true", help="skip sending the email")
+    parser.add_argument("--resume", action="store_true",
+                        help="with --once, finish an interrupted run from its checkpoints")
+    args = parser.parse_args()
+
+    service = MonitorService(email=not args.no_email)
+    if args.once:
+        return service.run_once(send_email=service.email, resume=args.resume)
+
+    if STATUS_PORT is not None:
+        start_status_server(service)
+    if WEBHOOK_INGEST:
+        start_webhook_server()
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        service.stop_event.set()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
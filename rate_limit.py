@@ -0,0 +1,112 @@
+import random
+import threading
+import time
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, bursting up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def set_rate(self, rate):
+        with self.lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+
+    def acquire(self, deadline=None):
+        """Take one token, sleeping until one is available; returns the seconds waited"""
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill(time.monotonic())
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            if deadline:
+                deadline.check(delay)
+            time.sleep(delay)
+            waited += delay
+
+class RateLimiter:
+    """Paces requests to one host and adapts to the RateLimit-* headers it sends back
+
+    Waits take an optional `deadline` (crawl_budget.Deadline): a wait that would
+    outlast it raises BudgetExceeded instead of sleeping.
+    """
+
+    def __init__(self, rate, burst, max_retries, backoff_base, backoff_max):
+        self.base_rate = rate
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "retries": 0, "rate_limited": 0, "throttled_seconds": 0.0}
+
+    def _count(self, key, amount=1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def wait(self, deadline=None):
+        """Block until this host may receive another request"""
+        waited = 0.0
+        pause = self.paused_until - time.time()
+        if pause > 0:
+            if deadline:
+                deadline.check(pause)
+            time.sleep(pause)
+            waited += pause
+        waited += self.bucket.acquire(deadline)
+        self._count("requests")
+        if waited:
+            self._count("throttled_seconds", waited)
+
+    def pause_until(self, timestamp):
+        """Hold every thread talking to this host until `timestamp` (epoch seconds)"""
+        with self.lock:
+            self.paused_until = max(self.paused_until, timestamp)
+
+    def observe(self, response):
+        """Spread the remaining quota over the rest of the window, as reported by the server"""
+        remaining = response.headers.get("RateLimit-Remaining")
+        reset = response.headers.get("RateLimit-Reset")
+        if remaining is None or reset is None:
+            return
+        try:
+            remaining = int(remaining)
+            reset = float(reset)
+        except ValueError:
+            return
+        if remaining <= 0:
+            self.pause_until(reset)
+            return
+        window = max(reset - time.time(), 1.0)
+        self.bucket.set_rate(min(self.base_rate, remaining / window))
+
+    def backoff(self, attempt, response=None, deadline=None):
+        """Sleep before retry number `attempt`, preferring the server's Retry-After hint"""
+        delay = None
+        if response is not None and response.status_code == 429:
+            self._count("rate_limited")
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                delay = float(retry_after)
+                self.pause_until(time.time() + delay)
+        if delay is None:
+            # Full jitter keeps concurrent workers from retrying in lockstep
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if deadline:
+            deadline.check(delay)
+        self._count("retries")
+        self._count("throttled_seconds", delay)
+        time.sleep(delay)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+
+import argparse
+import csv
+import os
+import re
+import sqlite3
+import sys
+from datetime import date, timedelta
+import config
+
+HISTORY_PATH = getattr(config, "REPORT_HISTORY_PATH", "report_history.sqlite3")
+
+REPORT_DATE = re.compile(r"gitlab_activity_report_(\d{4}-\d{2}-\d{2})\.csv$")
+
+class ReportHistory:
+    """Indexed SQLite copy of every daily report, one row per (date, project, username)"""
+
+    def __init__(self, path=None):
+        path = path or HISTORY_PATH
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(path)
+        # Histories created before reports carried usernames are keyed by display name;
+        # move them aside (with their indexes) and copy them over with the name as username
+        columns = [row[1] for row in self.db.execute("PRAGMA table_info(activity)")]
+        migrate = bool(columns) and "username" not in columns
+        if migrate:
+            self.db.executescript(
+                """
+                DROP INDEX IF EXISTS activity_developer;
+                DROP INDEX IF EXISTS activity_project;
+                ALTER TABLE activity RENAME TO activity_by_name;
+                """
+            )
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS activity (
+                report_date TEXT NOT NULL,
+                project TEXT NOT NULL,
+                username TEXT NOT NULL,
+                developer TEXT NOT NULL,
+                latest_activity TEXT NOT NULL,
+                activity_at TEXT,
+                PRIMARY KEY (report_date, project, username)
+            );
+            CREATE INDEX IF NOT EXISTS activity_username ON activity (username, activity_at);
+            CREATE INDEX IF NOT EXISTS activity_project ON activity (project, report_date);
+            """
+        )
+        if migrate:
+            self.db.executescript(
+                """
+                INSERT OR REPLACE INTO activity
+                    SELECT report_date, project, developer, developer, latest_activity, activity_at
+                    FROM activity_by_name;
+                DROP TABLE activity_by_name;
+                """
+            )
+        self.db.commit()
+
+    def upsert(self, report_date, rows):
+        """Store report rows ([#, developer, username, project, activity, timestamp]) for one date"""
+        self.db.executemany(
+            "INSERT OR REPLACE INTO activity VALUES (?, ?, ?, ?, ?, ?)",
+            [(report_date, row[3], row[2], row[1], row[4], row[5] or None) for row in rows],
+        )
+        self.db.commit()
+
+    def import_csv(self, path):
+        """Load an existing gitlab_activity_report_<date>.csv; returns the number of rows
+
+        Reports from before the Username column are keyed by display name.
+        """
+        match = REPORT_DATE.search(os.path.basename(path))
+        if not match:
+            raise ValueError(f"Cannot tell the report date from {path}")
+        with open(path, newline="") as csvfile:
+            reader = csv.reader(csvfile)
+            header = next(reader, [])
+            rows = list(reader)
+        if "Username" not in header:
+            rows = [row[:2] + row[1:] for row in rows]
+        self.upsert(match.group(1), rows)
+        return len(rows)
+
+    def last_seen(self, developer=None):
+        """Return [(username, developer, last activity timestamp or None)], most recently seen first
+
+        `developer` may be a username or a display name.
+        """
+        # SQLite takes the bare developer column from the row holding MAX(activity_at)
+        query = "SELECT username, developer, MAX(activity_at) FROM activity"
+        params = ()
+        if developer:
+            query += " WHERE username = ? OR developer = ?"
+            params = (developer, developer)
+        query += " GROUP BY username ORDER BY MAX(activity_at) DESC"
+        return self.db.execute(query, params).fetchall()
+
+    def inactive_since(self, days, today=None):
+        """Return [(username, developer, last seen or None)] for everyone with no activity in `days` days"""
+        cutoff = ((today or date.today()) - timedelta(days=days)).isoformat()
+        return self.db.execute(
+            "SELECT username, developer, MAX(activity_at) AS seen FROM activity GROUP BY username "
+            "HAVING seen IS NULL OR seen < ? ORDER BY seen",
+            (cutoff,),
+        ).fetchall()
+
+    def project_trend(self, project=None, days=90, today=None):
+        """Return [(report_date, project, active developers, developers)] per report"""
+        since = ((today or date.today()) - timedelta(days=days)).isoformat()
+        query = (
+            "SELECT report_date, project, COUNT(activity_at), COUNT(*) FROM activity "
+            "WHERE report_date >= ?"
+        )
+        params = [since]
+        if project:
+            query += " AND project = ?"
+            params.append(project)
+        query += " GROUP BY report_date, project ORDER BY project, report_date"
+        return self.db.execute(query, params).fetchall()
+
+    def close(self):
+        self.db.close()
+
+class HistorySink:
+    """Report sink that upserts each batch of rows into the history index"""
+
+    def __init__(self, report_date, path=None):
+        self.report_date = report_date
+        self.history = ReportHistory(path)
+
+    def write_rows(self, rows):
+        # An "Incomplete" row says nothing about activity, so it must not read as inactivity
+        self.history.upsert(self.report_date, [row for row in rows if not row[4].startswith("Incomplete")])
+
+    def close(self):
+        self.history.close()
+
+def main():
+    """Query CLI over the report history"""
+    parser = argparse.ArgumentParser(description="Query historical GitLab activity reports")
+    parser.add_argument("--db", default=HISTORY_PATH, help="history database path")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    load = commands.add_parser("import", help="import existing CSV reports")
+    load.add_argument("files", nargs="+")
+
+    inactive = commands.add_parser("inactive", help="developers with no activity for N days")
+    inactive.add_argument("--days", type=int, default=21)
+
+    seen = commands.add_parser("last-seen", help="last activity per developer")
+    seen.add_argument("--developer", help="username or display name")
+
+    trend = commands.add_parser("trend", help="active developers per project per report")
+    trend.add_argument("--project")
+    trend.add_argument("--days", type=int, default=90)
+
+    args = parser.parse_args()
+    history = ReportHistory(args.db)
+
+    if args.command == "import":
+        for path in args.files:
+            print(f"📥 {path}: {history.import_csv(path)} rows")
+    elif args.command == "inactive":
+        rows = history.inactive_since(args.days)
+        print(f"😴 {len(rows)} developers inactive for {args.days}+ days:")
+        for username, developer, seen_at in rows:
+            print(f"  - {developer} (@{username}): last seen {seen_at or 'never'}")
+    elif args.command == "last-seen":
+        for username, developer, seen_at in history.last_seen(args.developer):
+            print(f"  - {developer} (@{username}): {seen_at or 'never'}")
+    elif args.command == "trend":
+        for report_date, project, active, total in history.project_trend(args.project, args.days):
+            print(f"  {project} {report_date}: {active}/{total} active")
+
+    history.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+import re
+import config
+from report_sinks import REPORT_FORMATS, ReportWriter
+
+# Filtered reports per recipient: {"lead@domain.com": {"projects": [...], "users": [...]}}.
+# A recipient gets every row of the listed projects (names or IDs) plus the rows of the
+# listed usernames in any project; a recipient without rules gets the full report.
+REPORT_RECIPIENTS = getattr(config, "REPORT_RECIPIENTS", {})
+
+def _slug(email):
+    # The whole address: admin@team-a.com and admin@team-b.com must not share a file
+    return re.sub(r"[^A-Za-z0-9]+", "_", email).strip("_").lower()
+
+class ReportPartitioner:
+    """Writes a filtered copy of the report per recipient from the same rows, in the same pass
+
+    Only the emailed format (the first of REPORT_FORMATS) is written per recipient.
+    """
+
+    def __init__(self, basename, recipients=None, formats=None):
+        recipients = REPORT_RECIPIENTS if recipients is None else recipients
+        formats = formats or REPORT_FORMATS[:1]
+        self.rules = {}
+        self.writers = {}
+        for email, rule in recipients.items():
+            self.rules[email] = (set(rule.get("projects", ())), set(rule.get("users", ())))
+            self.writers[email] = ReportWriter(f"{basename}_{_slug(email)}", formats=formats)
+
+    @property
+    def paths(self):
+        """{recipient: path of their report}"""
+        return {email: writer.paths[0] for email, writer in self.writers.items()}
+
+    def write_project(self, project, members, rows):
+        """Route one project's rows (one per member, in member order) to every matching recipient"""
+        for email, (projects, users) in self.rules.items():
+            if not projects and not users:
+                selected = rows
+            elif project["name"] in projects or project["id"] in projects:
+                selected = rows
+            elif users:
+                selected = [row for member, row in zip(members, rows) if member["username"] in users]
+            else:
+                continue
+            if selected:
+                self.writers[email].write_rows(selected)
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
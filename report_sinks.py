@@ -0,0 +1,152 @@
+import csv
+import gzip
+import json
+import config
+from activity_metrics import METRICS, REPORT_METRICS
+from activity_table import timestamp_to_ms
+
+# Which files each run writes; the first one is the report that gets emailed
+REPORT_FORMATS = getattr(config, "REPORT_FORMATS", ["csv"])
+
+CSV_HEADER = ["#", "Developer Name", "Username", "Project", "Latest Activity", "Activity Timestamp"]
+
+# Field names for the structured formats, in CSV column order
+FIELDS = ["index", "developer", "username", "project", "latest_activity", "activity_timestamp"]
+
+# Every sink takes the names of the metric columns that follow the fields above
+
+class CsvSink:
+    """Writes report rows to a CSV file as they arrive"""
+
+    extension = "csv"
+
+    def __init__(self, path, metric_names=()):
+        self.path = path
+        self.file = self._open(path)
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(CSV_HEADER + [METRICS[name].title for name in metric_names])
+
+    def _open(self, path):
+        return open(path, "w", newline="")
+
+    def write_rows(self, rows):
+        # csv writes None (an Incomplete row's metrics) as an empty field
+        self.writer.writerows(rows)
+        # Flushing per batch keeps memory flat and leaves a readable file if the run dies
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class GzipCsvSink(CsvSink):
+    extension = "csv.gz"
+
+    def _open(self, path):
+        return gzip.open(path, "wt", newline="")
+
+class JsonLinesSink:
+    """Writes one JSON object per report row"""
+
+    extension = "jsonl"
+
+    def __init__(self, path, metric_names=()):
+        self.path = path
+        self.file = open(path, "w")
+        self.fields = FIELDS + list(metric_names)
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.file.write(json.dumps(dict(zip(self.fields, row))) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class ArrowSink:
+    """Writes each batch of rows as an Arrow IPC record batch
+
+    Timestamps become real UTC timestamp columns, so history can be read
+    column-wise without parsing text. Needs the optional pyarrow package.
+    """
+
+    extension = "arrow"
+
+    def __init__(self, path, metric_names=()):
+        try:
+            import pyarrow
+        except ImportError:
+            raise RuntimeError(f"pyarrow is required for the {self.extension} report format: pip install pyarrow")
+        self.pa = pyarrow
+        self.path = path
+        self.schema = pyarrow.schema([
+            ("index", pyarrow.int32()),
+            ("developer", pyarrow.string()),
+            ("username", pyarrow.string()),
+            ("project", pyarrow.string()),
+            ("latest_activity", pyarrow.string()),
+            ("activity_timestamp", pyarrow.timestamp("ms", tz="UTC")),
+        ] + [(name, pyarrow.int64()) for name in metric_names])
+        self.writer = self._open_writer(path)
+
+    def _open_writer(self, path):
+        return self.pa.ipc.new_file(path, self.schema)
+
+    def write_rows(self, rows):
+        if not rows:
+            return
+        columns = [list(column) for column in zip(*rows)]
+        columns[5] = [timestamp_to_ms(value) if value else None for value in columns[5]]
+        self.writer.write_table(self.pa.Table.from_arrays(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+class ParquetSink(ArrowSink):
+    """Writes each batch of rows as a Parquet row group"""
+
+    extension = "parquet"
+
+    def _open_writer(self, path):
+        import pyarrow.parquet
+        return pyarrow.parquet.ParquetWriter(path, self.schema)
+
+SINKS = {sink.extension: sink for sink in (CsvSink, GzipCsvSink, JsonLinesSink, ArrowSink, ParquetSink)}
+
+class ReportWriter:
+    """Numbers report rows and fans each batch out to every configured sink
+
+    `extra_sinks` receive the same rows but are not report files, e.g. the
+    history index. Rows carry one value per `metric_names` after the fixed
+    columns (REPORT_METRICS by default).
+    """
+
+    def __init__(self, basename, formats=None, extra_sinks=(), metric_names=None):
+        formats = formats or REPORT_FORMATS
+        metric_names = REPORT_METRICS if metric_names is None else metric_names
+        unknown = [f for f in formats if f not in SINKS]
+        if unknown:
+            raise ValueError(f"Unknown report format(s): {', '.join(unknown)}")
+        self.files = [SINKS[f](f"{basename}.{f}", metric_names) for f in formats]
+        self.sinks = self.files + list(extra_sinks)
+        self.count = 0
+
+    @property
+    def paths(self):
+        return [sink.path for sink in self.files]
+
+    def write_rows(self, rows):
+        """Write one project's rows, prefixed with their running row number"""
+        numbered = [[self.count + idx] + row for idx, row in enumerate(rows, start=1)]
+        self.count += len(numbered)
+        for sink in self.sinks:
+            sink.write_rows(numbered)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -2,6 +2,7 @@
 
 # GitLab Monitoring Daily Script
 # Runs at 7:30 PM IST daily
+# (Alternatively run `python3 monitor_service.py` as a long-lived service with its own scheduler.)
 
 # Set the working directory
 cd /home/simadmin/gitlab_monitoring_backup
@@ -18,8 +19,28 @@ echo "=== GitLab Monitoring Started at $(date) ===" >> $LOG_FILE
 echo "Working Directory: $(pwd)" >> $LOG_FILE
 echo "" >> $LOG_FILE
 
-# Run the Python script
-python3 gitlab.py >> $LOG_FILE 2>&1
+# Generate the report and email it via SMTP in a single Python process
+python3 monitor_service.py --once >> $LOG_FILE 2>&1
+STATUS=$?
+
+# If the crawl died partway, finish it once from its checkpoints instead of starting over.
+# Exit status 2 means the report was built but delivery failed; rerunning would
+# crawl again and re-mail recipients who already got it, so that is only logged.
+if [ $STATUS -ne 0 ] && [ $STATUS -ne 2 ]; then
+    echo "Run failed; resuming from the last checkpoint" >> $LOG_FILE
+    python3 monitor_service.py --once --resume >> $LOG_FILE 2>&1
+    STATUS=$?
+fi
+
+if [ $STATUS -eq 0 ]; then
+    echo "Report generated and email sent successfully via SMTP" >> $LOG_FILE
+elif [ $STATUS -eq 2 ]; then
+    echo "Report generated but email delivery failed; not rerunning the crawl" >> $LOG_FILE
+    echo "Please check the output above and your Gmail App Password configuration in config.py" >> $LOG_FILE
+else
+    echo "Report generation or email delivery failed" >> $LOG_FILE
+    echo "Please check the output above and your Gmail App Password configuration in config.py" >> $LOG_FILE
+fi
 
 # Log completion
 echo "" >> $LOG_FILE
@@ -27,48 +48,4 @@ echo "=== GitLab Monitoring Completed at $(date) ===" >> $LOG_FILE
 echo "Generated files:" >> $LOG_FILE
 ls -la *.csv >> $LOG_FILE 2>&1
 
-# Get the latest CSV file generated today
-LATEST_CSV=$(ls -t gitlab_activity_report_*.csv 2>/dev/null | head -n 1)
-
-if [ -n "$LATEST_CSV" ]; then
-    # Send email with CSV attachment using SMTP (reliable, no token expiry!)
-    echo "Sending email with attachment: $LATEST_CSV" >> $LOG_FILE
-    
-    # Get current date and time for email
-    CURRENT_DATE=$(date +%Y-%m-%d)
-    CURRENT_TIMESTAMP=$(date)
-    
-    # Create email content
-    EMAIL_SUBJECT="GitLab Activity Report - $CURRENT_DATE"
-    EMAIL_BODY="Hello,
-
-Please find attached the GitLab activity report generated on $CURRENT_DATE.
-
-Report Details:
-- Generated at: $CURRENT_TIMESTAMP  
-- Report file: $LATEST_CSV
-- Monitoring script completed successfully
-
-Best regards,
-GitLab Monitoring System"
-    
-    # Send email using SMTP (Gmail) - reliable and never expires!
-    python3 send_email_smtp.py \
-        "$(python3 -c 'from config import FROM_EMAIL; print(FROM_EMAIL)')" \
-        "$(python3 -c 'from config import EMAIL_PASSWORD; print(EMAIL_PASSWORD)')" \
-        "$(python3 -c 'from config import TO_EMAIL; print(TO_EMAIL)')" \
-        "$EMAIL_SUBJECT" \
-        "$EMAIL_BODY" \
-        "$LATEST_CSV" >> $LOG_FILE 2>&1
-    
-    if [ $? -eq 0 ]; then
-        echo "Email sent successfully via SMTP (Gmail)" >> $LOG_FILE
-    else
-        echo "Failed to send email via SMTP" >> $LOG_FILE
-        echo "Please check your Gmail App Password configuration in config.py" >> $LOG_FILE
-    fi
-else
-    echo "No CSV file found to send" >> $LOG_FILE
-fi
-
-echo "GitLab monitoring completed. Check $LOG_FILE for details." 
\ No newline at end of file
+echo "GitLab monitoring completed. Check $LOG_FILE for details."
@@ -1,14 +1,174 @@
 #!/usr/bin/env python3
 
-import requests
+import http_client
 import json
-import base64
 import os
+import re
 import sys
+import threading
+import time
+import uuid
 from datetime import datetime
+from urllib.parse import quote
+import requests
+import config
 from config import GRAPH_TOKEN, FROM_EMAIL, TO_EMAIL
+from email_payload import compress_attachment, content_type, iter_base64
+from send_email_smtp import DeliveryResult
+
+# Graph and Entra ID endpoints; point both at mock_graph_server.py to test locally
+GRAPH_API_URL = getattr(config, "GRAPH_API_URL", "https://graph.microsoft.com/v1.0")
+GRAPH_AUTHORITY_URL = getattr(config, "GRAPH_AUTHORITY_URL", "https://login.microsoftonline.com")
+
+# App registration for the client-credentials flow (application permission Mail.Send);
+# without it the hand-pasted GRAPH_TOKEN is used
+GRAPH_TENANT_ID = getattr(config, "GRAPH_TENANT_ID", None)
+GRAPH_CLIENT_ID = getattr(config, "GRAPH_CLIENT_ID", None)
+GRAPH_CLIENT_SECRET = getattr(config, "GRAPH_CLIENT_SECRET", None)
+
+# Mailbox that batch sends go out from
+GRAPH_SENDER = getattr(config, "GRAPH_SENDER", FROM_EMAIL)
+
+# Tokens are reused across runs until shortly before they expire
+GRAPH_TOKEN_CACHE_PATH = getattr(config, "GRAPH_TOKEN_CACHE_PATH", "cache/graph_token.json")
+TOKEN_REFRESH_MARGIN = 300
+
+# Attachments above this size go through an upload session instead of inline base64
+GRAPH_UPLOAD_THRESHOLD = int(getattr(config, "GRAPH_UPLOAD_THRESHOLD_MB", 3) * 1024 * 1024)
+
+# Graph allows 20 requests per $batch and 4 MB per request body
+GRAPH_BATCH_SIZE = 20
+GRAPH_BATCH_MAX_BYTES = 3 * 1024 * 1024
+
+# Upload session chunks must be multiples of 320 KiB
+UPLOAD_CHUNK_SIZE = 10 * 320 * 1024
 
-def send_email_with_graph(token, recipient, subject, body, attachment_path=None):
+RETRY_STATUSES = {429, 503, 504}
+
+class GraphAPIError(Exception):
+    """Raised when Graph refuses a token, draft or upload request"""
+
+    def __init__(self, path, response):
+        super().__init__(f"{path}: {response.status_code} - {response.text}")
+        self.path = path
+        self.status_code = response.status_code
+
+class StreamedJSON:
+    """A JSON request body whose inline attachments are base64-encoded from disk as it is sent
+
+    `data` holds placeholder strings that `files` maps to file paths. The
+    length is known up front, so requests sends a Content-Length rather than
+    chunking, and iterating again (e.g. on a retry) re-reads the files.
+    """
+
+    def __init__(self, data, files):
+        text = json.dumps(data)
+        self.pieces = []
+        pos = 0
+        if files:
+            # Placeholders are JSON-safe, so they appear in the text as written
+            for match in re.finditer("|".join(map(re.escape, files)), text):
+                self.pieces.append(text[pos:match.start()].encode())
+                self.pieces.append(files[match.group()])
+                pos = match.end()
+        self.pieces.append(text[pos:].encode())
+
+    def __len__(self):
+        return sum(
+            4 * -(-os.path.getsize(piece) // 3) if isinstance(piece, str) else len(piece)
+            for piece in self.pieces
+        )
+
+    def __iter__(self):
+        for piece in self.pieces:
+            if isinstance(piece, str):
+                for chunk in iter_base64(piece):
+                    yield chunk.encode("ascii")
+            else:
+                yield piece
+
+class TokenCache:
+    """Client-credentials access token held in memory and on disk, refreshed before it expires"""
+
+    def __init__(self, path=None):
+        self.path = path or GRAPH_TOKEN_CACHE_PATH
+        self.lock = threading.Lock()
+        self.token = None
+        self.expires_at = 0.0
+        self.loaded = False
+
+    def _load(self):
+        self.loaded = True
+        try:
+            with open(self.path) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return
+        if cached.get("client_id") == GRAPH_CLIENT_ID:
+            self.token = cached["access_token"]
+            self.expires_at = cached["expires_at"]
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        # The token grants Mail.Send, so keep it private to this user
+        with os.fdopen(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as f:
+            json.dump({"client_id": GRAPH_CLIENT_ID, "access_token": self.token,
+                       "expires_at": self.expires_at}, f)
+        os.replace(tmp_path, self.path)
+
+    def _fetch(self):
+        path = f"/{GRAPH_TENANT_ID}/oauth2/v2.0/token"
+        response = http_client.request("POST", f"{GRAPH_AUTHORITY_URL}{path}", session="graph", data={
+            "grant_type": "client_credentials",
+            "client_id": GRAPH_CLIENT_ID,
+            "client_secret": GRAPH_CLIENT_SECRET,
+            "scope": "https://graph.microsoft.com/.default",
+        })
+        if response.status_code != 200:
+            raise GraphAPIError(path, response)
+        data = response.json()
+        self.token = data["access_token"]
+        self.expires_at = time.time() + int(data["expires_in"])
+        self._save()
+        print(f"🔑 Fetched a Graph token valid for {int(data['expires_in']) // 60} minutes")
+
+    def get(self):
+        """Return a token with at least TOKEN_REFRESH_MARGIN seconds left, fetching one if needed"""
+        with self.lock:
+            if not self.loaded:
+                self._load()
+            if self.token is None or time.time() >= self.expires_at - TOKEN_REFRESH_MARGIN:
+                self._fetch()
+            return self.token
+
+    def invalidate(self):
+        """Forget a token Graph rejected, so the next get() fetches a new one"""
+        with self.lock:
+            self.token = None
+            self.expires_at = 0.0
+
+_token_cache = TokenCache()
+
+def get_access_token():
+    """Cached client-credentials token when an app registration is configured, else GRAPH_TOKEN"""
+    if GRAPH_CLIENT_ID:
+        return _token_cache.get()
+    return GRAPH_TOKEN
+
+def graph_request(method, path, headers=None, **kwargs):
+    """Call the Graph API with the cached token, fetching a new one once if it's rejected"""
+    for attempt in range(2):
+        request_headers = dict(headers or {}, Authorization=f"Bearer {get_access_token()}")
+        response = http_client.request(method, f"{GRAPH_API_URL}{path}", session="graph",
+                                       headers=request_headers, **kwargs)
+        if response.status_code != 401 or attempt or not GRAPH_CLIENT_ID:
+            return response
+        _token_cache.invalidate()
+
+def send_email_with_graph(token, recipient, subject, body, attachment_path=None, html_body=None):
     """
     Send email using Microsoft Graph API
     
@@ -17,14 +177,15 @@ def send_email_with_graph(token, recipient, subject, body, attachment_path=None)
         recipient (str): Email address of the recipient
         subject (str): Email subject
         body (str): Email body text
-        attachment_path (str): Path to attachment file (optional)
+        attachment_path (str): Path to attachment file, compressed if large (optional)
+        html_body (str): HTML body sent instead of the text one (optional)
     
     Returns:
         bool: True if successful, False otherwise
     """
     
     # Graph API endpoint for sending emails
-    url = "https://graph.microsoft.com/v1.0/me/sendMail"
+    url = f"{GRAPH_API_URL}/me/sendMail"
     
     # Headers
     headers = {
@@ -37,8 +198,8 @@ def send_email_with_graph(token, recipient, subject, body, attachment_path=None)
         "message": {
             "subject": subject,
             "body": {
-                "contentType": "Text",
-                "content": body
+                "contentType": "HTML" if html_body else "Text",
+                "content": html_body or body
             },
             "toRecipients": [
                 {
@@ -51,26 +212,23 @@ def send_email_with_graph(token, recipient, subject, body, attachment_path=None)
     }
     
     # Add attachment if provided
+    files = {}
     if attachment_path and os.path.exists(attachment_path):
         try:
-            with open(attachment_path, 'rb') as file:
-                file_content = file.read()
-                file_name = os.path.basename(attachment_path)
-                
-                # Encode file content to base64
-                file_base64 = base64.b64encode(file_content).decode('utf-8')
-                
-                # Add attachment to email
-                email_data["message"]["attachments"] = [
-                    {
-                        "@odata.type": "#microsoft.graph.fileAttachment",
-                        "name": file_name,
-                        "contentType": "text/csv",
-                        "contentBytes": file_base64
-                    }
-                ]
-                
-                print(f"Attachment added: {file_name} ({len(file_content)} bytes)")
+            attachment = read_attachment(attachment_path)
+            
+            # Add attachment to email; its base64 is streamed from the file as the request is sent
+            email_data["message"]["attachments"] = [
+                {
+                    "@odata.type": "#microsoft.graph.fileAttachment",
+                    "name": attachment["name"],
+                    "contentType": content_type(attachment["path"]),
+                    "contentBytes": attachment["placeholder"]
+                }
+            ]
+            files[attachment["placeholder"]] = attachment["path"]
+            
+            print(f"Attachment added: {attachment['name']} ({attachment['size']} bytes)")
                 
         except Exception as e:
             print(f"Error processing attachment: {str(e)}")
@@ -78,7 +236,8 @@ def send_email_with_graph(token, recipient, subject, body, attachment_path=None)
     
     try:
         # Send the email
-        response = requests.post(url, headers=headers, json=email_data)
+        response = http_client.request("POST", url, session="graph", headers=headers,
+                                       data=StreamedJSON(email_data, files))
         
         if response.status_code == 202:
             print("Email sent successfully!")
@@ -118,6 +277,201 @@ def send_email_with_graph(token, recipient, subject, body, attachment_path=None)
         print(f"Error sending email: {str(e)}")
         return False
 
+def read_attachment(attachment_path):
+    """
+    Prepare an attachment once for every message that carries it
+    
+    Files over ATTACHMENT_COMPRESS_THRESHOLD_MB are compressed first. Nothing
+    is encoded here: attachments small enough to inline are base64-encoded
+    into each request body as it is sent (see StreamedJSON), and larger ones
+    are read in chunks when they are uploaded.
+    
+    Args:
+        attachment_path (str): Path to attachment file
+    
+    Returns:
+        dict: path and name of the file sent, its size, whether it is inlined,
+        and the placeholder that stands for its contentBytes
+    """
+    attachment_path = compress_attachment(attachment_path)
+    size = os.path.getsize(attachment_path)
+    return {
+        "path": attachment_path,
+        "name": os.path.basename(attachment_path),
+        "size": size,
+        "inline": size <= GRAPH_UPLOAD_THRESHOLD,
+        "placeholder": f"[attachment {uuid.uuid4().hex}]",
+    }
+
+def _json_body(data, attachments):
+    """`data` as a StreamedJSON body that fills in the inline attachments' contentBytes"""
+    files = {attachment["placeholder"]: attachment["path"]
+             for attachment in attachments.values() if attachment["inline"]}
+    return StreamedJSON(data, files)
+
+def _message_json(delivery, attachments):
+    message = {
+        "subject": delivery.subject,
+        "body": ({"contentType": "HTML", "content": delivery.html_body} if delivery.html_body
+                 else {"contentType": "Text", "content": delivery.body}),
+        "toRecipients": [{"emailAddress": {"address": delivery.to_email}}],
+    }
+    inline = [attachments[path] for path in delivery.attachment_paths if attachments[path]["inline"]]
+    if inline:
+        message["attachments"] = [
+            {
+                "@odata.type": "#microsoft.graph.fileAttachment",
+                "name": attachment["name"],
+                "contentType": content_type(attachment["path"]),
+                "contentBytes": attachment["placeholder"],
+            }
+            for attachment in inline
+        ]
+    return message
+
+def _batches(requests):
+    """Group $batch sub-requests by Graph's count limit and a body size budget"""
+    batch, size = [], 0
+    for request, request_size in requests:
+        if batch and (len(batch) == GRAPH_BATCH_SIZE or size + request_size > GRAPH_BATCH_MAX_BYTES):
+            yield batch
+            batch, size = [], 0
+        batch.append(request)
+        size += request_size
+    if batch:
+        yield batch
+
+def _send_batch(batch, results, attachments):
+    """POST one $batch of sendMail requests, retrying throttled sub-requests; fills `results` by index"""
+    pending = {request["id"]: request for request in batch}
+    for attempt in range(http_client.MAX_RETRIES + 1):
+        response = graph_request("POST", "/$batch", headers={"Content-Type": "application/json"},
+                                 data=_json_body({"requests": list(pending.values())}, attachments))
+        if response.status_code != 200:
+            error = f"$batch failed: {response.status_code} - {response.text}"
+            for request_id in pending:
+                results[int(request_id)] = error
+            return
+        retry_after = 0
+        for sub in response.json()["responses"]:
+            if sub["status"] in RETRY_STATUSES and attempt < http_client.MAX_RETRIES:
+                retry_after = max(retry_after, int(sub.get("headers", {}).get("Retry-After", 1)))
+                continue
+            request_id = sub["id"]
+            del pending[request_id]
+            if sub["status"] == 202:
+                results[int(request_id)] = None
+            else:
+                error = (sub.get("body") or {}).get("error", {})
+                results[int(request_id)] = f"{sub['status']} {error.get('code', '')}: {error.get('message', '')}"
+        if not pending:
+            return
+        time.sleep(retry_after)
+
+def _check(response, path, expected):
+    if response.status_code not in expected:
+        raise GraphAPIError(path, response)
+    return response
+
+def _send_with_upload(delivery, attachments, sender_path):
+    """Create a draft, stream its large attachments through upload sessions, then send it"""
+    path = f"{sender_path}/messages"
+    response = graph_request("POST", path, headers={"Content-Type": "application/json"},
+                             data=_json_body(_message_json(delivery, attachments), attachments))
+    draft = _check(response, path, (201,)).json()
+    message_path = f"{path}/{draft['id']}"
+    for attachment_path in delivery.attachment_paths:
+        attachment = attachments[attachment_path]
+        if attachment["inline"]:
+            continue
+        path = f"{message_path}/attachments/createUploadSession"
+        session = _check(graph_request("POST", path, json={"AttachmentItem": {
+            "attachmentType": "file", "name": attachment["name"], "size": attachment["size"],
+        }}), path, (201,)).json()
+        size = attachment["size"]
+        with open(attachment["path"], "rb") as file:
+            for start in range(0, size, UPLOAD_CHUNK_SIZE):
+                chunk = file.read(UPLOAD_CHUNK_SIZE)
+                # The upload URL is pre-authorised; Graph rejects an Authorization header on it
+                response = http_client.request("PUT", session["uploadUrl"], session="graph", data=chunk, headers={
+                    "Content-Range": f"bytes {start}-{start + len(chunk) - 1}/{size}",
+                })
+                _check(response, "uploadSession", (200, 201))
+        print(f"📤 Uploaded {attachment['name']} ({size} bytes) for {delivery.to_email}")
+    path = f"{message_path}/send"
+    _check(graph_request("POST", path), path, (202,))
+
+def send_batch_graph(deliveries, sender=None):
+    """
+    Send many messages through Graph: $batch of up to 20 sendMail calls per round trip,
+    and upload sessions for messages whose attachments are too large to inline
+    
+    Args:
+        deliveries (list): Delivery tuples (to_email, subject, body, attachment_paths, html_body)
+        sender (str): Mailbox to send from (default GRAPH_SENDER)
+    
+    Returns:
+        list: A DeliveryResult per delivery, in the same order
+    """
+    sender_path = f"/users/{quote(sender or GRAPH_SENDER)}"
+    attachments = {}
+    errors = {}
+    for path in {path for d in deliveries for path in d.attachment_paths}:
+        try:
+            attachments[path] = read_attachment(path)
+            print(f"📎 Attachment read: {attachments[path]['name']} ({attachments[path]['size']} bytes)")
+        except OSError as e:
+            print(f"❌ Error processing attachment: {str(e)}")
+            errors[path] = f"Attachment unavailable: {path}"
+
+    results = {}
+    inline_requests = []
+    uploads = []
+    for index, delivery in enumerate(deliveries):
+        missing = [errors[path] for path in delivery.attachment_paths if path in errors]
+        if missing:
+            results[index] = "; ".join(missing)
+        elif not all(attachments[path]["inline"] for path in delivery.attachment_paths):
+            uploads.append((index, delivery))
+        else:
+            request = {
+                "id": str(index),
+                "method": "POST",
+                "url": f"{sender_path}/sendMail",
+                "headers": {"Content-Type": "application/json"},
+                "body": {"message": _message_json(delivery, attachments), "saveToSentItems": True},
+            }
+            inline_requests.append((request, len(_json_body(request, attachments))))
+
+    batches = list(_batches(inline_requests))
+    print(f"📧 Sending {len(inline_requests)} emails in {len(batches)} Graph batches"
+          + (f", {len(uploads)} with upload sessions" if uploads else ""))
+    for batch in batches:
+        try:
+            _send_batch(batch, results, attachments)
+        except (GraphAPIError, requests.RequestException) as e:
+            # No token, or Graph unreachable after retries: nothing left in this batch was sent
+            for request in batch:
+                results.setdefault(int(request["id"]), str(e))
+    for index, delivery in uploads:
+        try:
+            _send_with_upload(delivery, attachments, sender_path)
+            results[index] = None
+        except (GraphAPIError, requests.RequestException) as e:
+            results[index] = str(e)
+
+    delivery_results = []
+    for index, delivery in enumerate(deliveries):
+        error = results[index]
+        delivery_results.append(DeliveryResult(delivery.to_email, error is None, error))
+        if error is None:
+            print(f"  ✅ {delivery.to_email}")
+        else:
+            print(f"  ❌ {delivery.to_email}: {error}")
+    sent = sum(result.sent for result in delivery_results)
+    print(f"📬 Sent {sent}/{len(delivery_results)} emails")
+    return delivery_results
+
 def main():
     """Main function to handle command line arguments"""
     
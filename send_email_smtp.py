@@ -1,17 +1,215 @@
 #!/usr/bin/env python3
 
+import re
 import smtplib
 import ssl
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from queue import Empty, LifoQueue
+from typing import NamedTuple, Optional, Tuple
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.base import MIMEBase
-from email import encoders
 import os
 import sys
 from datetime import datetime
+import config
 from config import FROM_EMAIL, TO_EMAIL
+from email_payload import compress_attachment, content_type, iter_base64
 
-def send_email_smtp(from_email, password, to_email, subject, body, attachment_path=None):
+# Explicit SMTP server, e.g. "localhost" with port 1025 for a local aiosmtpd debugging
+# server; None picks one from the sender's domain
+SMTP_HOST = getattr(config, "SMTP_HOST", None)
+SMTP_PORT = getattr(config, "SMTP_PORT", 587)
+SMTP_STARTTLS = getattr(config, "SMTP_STARTTLS", True)
+
+# Authenticated connections kept open (and messages sent concurrently) by send_batch()
+SMTP_POOL_SIZE = getattr(config, "SMTP_POOL_SIZE", 4)
+
+class Delivery(NamedTuple):
+    """One message of a batch: its recipient, subject, body, attachment paths and optional HTML body"""
+    to_email: str
+    subject: str
+    body: str
+    attachment_paths: Tuple[str, ...] = ()
+    html_body: Optional[str] = None
+
+class DeliveryResult(NamedTuple):
+    to_email: str
+    sent: bool
+    error: Optional[str] = None
+
+def get_smtp_server(from_email):
+    """
+    Pick the SMTP server for a sender address
+    
+    Args:
+        from_email (str): Sender email address
+    
+    Returns:
+        tuple: (host, port), or None for an unknown provider
+    """
+    if SMTP_HOST:
+        return SMTP_HOST, SMTP_PORT
+
+    email_domain = from_email.split('@')[1].lower()
+    
+    if 'gmail' in email_domain:
+        return "smtp.gmail.com", 587
+    elif 'outlook' in email_domain or 'hotmail' in email_domain or 'live' in email_domain:
+        return "smtp-mail.outlook.com", 587
+    elif 'yahoo' in email_domain:
+        return "smtp.mail.yahoo.com", 587
+    elif 'simplyfi.tech' in email_domain:
+        # Custom domain - you may need to check with your email provider
+        return "smtp.gmail.com", 587  # If using Google Workspace
+    return None
+
+def open_smtp_connection(smtp_server, port, from_email, password):
+    """
+    Connect, enable TLS and log in
+    
+    Args:
+        smtp_server (str): SMTP host
+        port (int): SMTP port
+        from_email (str): Sender email address, used as the login
+        password (str): Email password or app password
+    
+    Returns:
+        smtplib.SMTP: An authenticated connection
+    """
+    server = smtplib.SMTP(smtp_server, port, timeout=30)
+    if SMTP_STARTTLS:
+        server.starttls(context=ssl.create_default_context())  # Enable TLS encryption
+    # Local debugging servers don't offer AUTH
+    if password and server.has_extn('auth'):
+        server.login(from_email, password)
+    return server
+
+def build_attachment(attachment_path):
+    """
+    Prepare a file as a MIME part that many messages can share
+    
+    Files over ATTACHMENT_COMPRESS_THRESHOLD_MB are compressed first. The part
+    only holds a placeholder: send_message() base64-encodes the file from disk
+    chunk by chunk as the message is sent, so it is never held in memory whole.
+    
+    Args:
+        attachment_path (str): Path to attachment file
+    
+    Returns:
+        MIMEBase: The attachment part
+    """
+    attachment_path = compress_attachment(attachment_path)
+    part = MIMEBase(*content_type(attachment_path).split('/'))
+    part.set_payload(f"[attachment {uuid.uuid4().hex}]")
+    part.source_path = attachment_path
+    part['Content-Transfer-Encoding'] = 'base64'
+    part.add_header(
+        'Content-Disposition',
+        f'attachment; filename= {os.path.basename(attachment_path)}',
+    )
+    return part
+
+def build_message(from_email, to_email, subject, body, parts=(), html_body=None):
+    """
+    Assemble a message from prepared attachment parts
+    
+    Args:
+        from_email (str): Sender email address
+        to_email (str): Recipient email address
+        subject (str): Email subject
+        body (str): Email body text
+        parts (iterable): MIME parts from build_attachment()
+        html_body (str): HTML version of the body, shown instead of the text where supported (optional)
+    
+    Returns:
+        MIMEMultipart: The message
+    """
+    msg = MIMEMultipart()
+    msg['From'] = from_email
+    msg['To'] = to_email
+    msg['Subject'] = subject
+    if html_body:
+        alternative = MIMEMultipart('alternative')
+        alternative.attach(MIMEText(body, 'plain'))
+        alternative.attach(MIMEText(html_body, 'html'))
+        msg.attach(alternative)
+    else:
+        msg.attach(MIMEText(body, 'plain'))
+    for part in parts:
+        msg.attach(part)
+    return msg
+
+def iter_message_data(msg):
+    """
+    Yield a message as SMTP DATA, swapping attachment placeholders for the files' base64
+    
+    Line endings are CRLF and lines starting with a dot are escaped, as
+    smtplib does for a whole message.
+    
+    Args:
+        msg (MIMEMultipart): Message from build_message()
+    
+    Returns:
+        generator: bytes chunks of the message
+    """
+    files = {part.get_payload(): part.source_path for part in msg.walk() if hasattr(part, 'source_path')}
+    text = msg.as_string()
+    pos = 0
+    if files:
+        for match in re.finditer('|'.join(map(re.escape, files)), text):
+            yield smtplib.quotedata(text[pos:match.start()]).encode('ascii')
+            # Base64 lines never start with a dot, so only the line endings need fixing
+            for chunk in iter_base64(files[match.group()], mime_lines=True):
+                yield chunk.replace('\n', '\r\n').encode('ascii')
+            pos = match.end()
+    tail = smtplib.quotedata(text[pos:])
+    if not tail.endswith('\r\n'):
+        tail += '\r\n'
+    yield tail.encode('ascii')
+
+def _reset(server):
+    """Abandon a refused transaction so the connection can send the next message"""
+    try:
+        server.rset()
+    except smtplib.SMTPServerDisconnected:
+        pass
+
+def send_message(server, from_email, to_email, msg):
+    """
+    Send a message like server.sendmail(), streaming its attachments from disk
+    
+    Args:
+        server (smtplib.SMTP): An open connection
+        from_email (str): Envelope sender
+        to_email (str): Envelope recipient
+        msg (MIMEMultipart): Message from build_message()
+    """
+    server.ehlo_or_helo_if_needed()
+    code, response = server.mail(from_email)
+    if code != 250:
+        _reset(server)
+        raise smtplib.SMTPSenderRefused(code, response, from_email)
+    code, response = server.rcpt(to_email)
+    if code not in (250, 251):
+        _reset(server)
+        raise smtplib.SMTPRecipientsRefused({to_email: (code, response)})
+    code, response = server.docmd('data')
+    if code != 354:
+        _reset(server)
+        raise smtplib.SMTPDataError(code, response)
+    for chunk in iter_message_data(msg):
+        server.send(chunk)
+    server.send(b'.\r\n')
+    code, response = server.getreply()
+    if code != 250:
+        _reset(server)
+        raise smtplib.SMTPDataError(code, response)
+
+def send_email_smtp(from_email, password, to_email, subject, body, attachment_path=None, html_body=None):
     """
     Send email using SMTP (Gmail, Outlook, etc.)
     
@@ -21,72 +219,42 @@ def send_email_smtp(from_email, password, to_email, subject, body, attachment_pa
         to_email (str): Recipient email address
         subject (str): Email subject
         body (str): Email body text
-        attachment_path (str): Path to attachment file (optional)
+        attachment_path (str): Path to attachment file, compressed if large (optional)
+        html_body (str): HTML version of the body (optional)
     
     Returns:
         bool: True if successful, False otherwise
     """
     
     try:
-        # Create message
-        msg = MIMEMultipart()
-        msg['From'] = from_email
-        msg['To'] = to_email
-        msg['Subject'] = subject
-        
-        # Add body to email
-        msg.attach(MIMEText(body, 'plain'))
-        
         # Add attachment if provided
+        parts = []
         if attachment_path and os.path.exists(attachment_path):
             try:
-                with open(attachment_path, "rb") as attachment:
-                    part = MIMEBase('application', 'octet-stream')
-                    part.set_payload(attachment.read())
-                
-                encoders.encode_base64(part)
-                part.add_header(
-                    'Content-Disposition',
-                    f'attachment; filename= {os.path.basename(attachment_path)}',
-                )
-                msg.attach(part)
-                print(f"📎 Attachment added: {os.path.basename(attachment_path)}")
+                parts.append(build_attachment(attachment_path))
+                print(f"📎 Attachment added: {parts[-1].get_filename()}")
                 
             except Exception as e:
                 print(f"❌ Error adding attachment: {str(e)}")
                 return False
         
-        # Determine SMTP server based on email domain
-        email_domain = from_email.split('@')[1].lower()
+        msg = build_message(from_email, to_email, subject, body, parts, html_body)
         
-        if 'gmail' in email_domain:
-            smtp_server = "smtp.gmail.com"
-            port = 587
-        elif 'outlook' in email_domain or 'hotmail' in email_domain or 'live' in email_domain:
-            smtp_server = "smtp-mail.outlook.com"
-            port = 587
-        elif 'yahoo' in email_domain:
-            smtp_server = "smtp.mail.yahoo.com"
-            port = 587
-        elif 'simplyfi.tech' in email_domain:
-            # Custom domain - you may need to check with your email provider
-            smtp_server = "smtp.gmail.com"  # If using Google Workspace
-            port = 587
-        else:
-            print(f"❌ Unknown email provider for {email_domain}")
-            print("   Please configure SMTP settings manually in the script")
+        # Determine SMTP server based on email domain
+        smtp_settings = get_smtp_server(from_email)
+        if smtp_settings is None:
+            print(f"❌ Unknown email provider for {from_email.split('@')[1].lower()}")
+            print("   Please set SMTP_HOST and SMTP_PORT in config.py")
             return False
+        smtp_server, port = smtp_settings
         
         print(f"📧 Using SMTP server: {smtp_server}:{port}")
         
         # Create SMTP session
-        server = smtplib.SMTP(smtp_server, port)
-        server.starttls()  # Enable TLS encryption
-        server.login(from_email, password)
+        server = open_smtp_connection(smtp_server, port, from_email, password)
         
         # Send email
-        text = msg.as_string()
-        server.sendmail(from_email, to_email, text)
+        send_message(server, from_email, to_email, msg)
         server.quit()
         
         print("✅ Email sent successfully!")
@@ -100,6 +268,131 @@ def send_email_smtp(from_email, password, to_email, subject, body, attachment_pa
         print("   - Check if 'Less secure app access' is enabled (not recommended)")
         return False
 
+class SMTPConnectionPool:
+    """Up to `size` authenticated SMTP connections, reused across messages and threads"""
+
+    def __init__(self, smtp_server, port, from_email, password, size=SMTP_POOL_SIZE):
+        self.smtp_server = smtp_server
+        self.port = port
+        self.from_email = from_email
+        self.password = password
+        self.idle = LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+
+    def _checkout(self):
+        try:
+            return self.idle.get_nowait()
+        except Empty:
+            return open_smtp_connection(self.smtp_server, self.port, self.from_email, self.password)
+
+    def _discard(self, server):
+        try:
+            server.close()
+        except Exception:
+            pass
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; it goes back to the pool unless the SMTP session broke"""
+        with self.slots:
+            server = self._checkout()
+            try:
+                yield server
+            except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+                # The server answered, so the session is still usable
+                self.idle.put(server)
+                raise
+            except BaseException:
+                self._discard(server)
+                raise
+            else:
+                self.idle.put(server)
+
+    def send(self, msg, to_email):
+        """Send one message, reconnecting once if the server dropped an idle connection"""
+        for attempt in range(2):
+            try:
+                with self.connection() as server:
+                    send_message(server, self.from_email, to_email, msg)
+                return
+            except smtplib.SMTPServerDisconnected:
+                if attempt:
+                    raise
+
+    def close(self):
+        while True:
+            try:
+                server = self.idle.get_nowait()
+            except Empty:
+                return
+            try:
+                server.quit()
+            except OSError:
+                self._discard(server)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def send_batch(from_email, password, deliveries, pool_size=SMTP_POOL_SIZE):
+    """
+    Send many messages concurrently over a pool of SMTP connections
+    
+    Each attachment file is compressed once, however many messages carry it, and
+    streamed from disk into each message as it is sent.
+    
+    Args:
+        from_email (str): Sender email address
+        password (str): Email password or app password
+        deliveries (list): Delivery tuples (to_email, subject, body, attachment_paths, html_body)
+        pool_size (int): Connections kept open and messages sent at once
+    
+    Returns:
+        list: A DeliveryResult per delivery, in the same order
+    """
+    smtp_settings = get_smtp_server(from_email)
+    if smtp_settings is None:
+        error = f"Unknown email provider for {from_email.split('@')[1].lower()}"
+        print(f"❌ {error}")
+        return [DeliveryResult(d.to_email, False, error) for d in deliveries]
+
+    parts = {}
+    for path in {path for d in deliveries for path in d.attachment_paths}:
+        try:
+            parts[path] = build_attachment(path)
+            print(f"📎 Attachment prepared: {parts[path].get_filename()}")
+        except OSError as e:
+            print(f"❌ Error adding attachment: {str(e)}")
+
+    def deliver(pool, delivery):
+        missing = [path for path in delivery.attachment_paths if path not in parts]
+        if missing:
+            return DeliveryResult(delivery.to_email, False, f"Attachment unavailable: {', '.join(missing)}")
+        msg = build_message(from_email, delivery.to_email, delivery.subject, delivery.body,
+                            [parts[path] for path in delivery.attachment_paths], delivery.html_body)
+        try:
+            pool.send(msg, delivery.to_email)
+        except (smtplib.SMTPException, OSError) as e:
+            return DeliveryResult(delivery.to_email, False, str(e))
+        return DeliveryResult(delivery.to_email, True)
+
+    print(f"📧 Sending {len(deliveries)} emails via {smtp_settings[0]}:{smtp_settings[1]} "
+          f"over up to {pool_size} connections")
+    with SMTPConnectionPool(*smtp_settings, from_email, password, size=pool_size) as pool:
+        with ThreadPoolExecutor(max_workers=pool_size) as executor:
+            results = list(executor.map(lambda delivery: deliver(pool, delivery), deliveries))
+
+    for result in results:
+        if result.sent:
+            print(f"  ✅ {result.to_email}")
+        else:
+            print(f"  ❌ {result.to_email}: {result.error}")
+    sent = sum(result.sent for result in results)
+    print(f"📬 Sent {sent}/{len(results)} emails")
+    return results
+
 def main():
     """Main function for command line usage"""
     
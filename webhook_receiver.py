@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+
+import argparse
+import hashlib
+import hmac
+import ipaddress
+import json
+import sys
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+import config
+import activity_store
+from activity_table import ms_to_timestamp, timestamp_to_ms
+from gitlab_api import Event
+
+# Where GitLab delivers project webhooks (push, merge request, note and issue events).
+# Loopback by default (e.g. behind a reverse proxy); any other interface needs WEBHOOK_SECRET.
+WEBHOOK_HOST = getattr(config, "WEBHOOK_HOST", "127.0.0.1")
+WEBHOOK_PORT = getattr(config, "WEBHOOK_PORT", 8082)
+
+# Must match the "Secret token" of the webhook in GitLab; None accepts any delivery
+WEBHOOK_SECRET = getattr(config, "WEBHOOK_SECRET", None)
+
+ZERO_SHA = "0" * 40
+
+# Hook action -> action_name as the events API reports it; other actions aren't events there
+MERGE_REQUEST_ACTIONS = {"open": "opened", "reopen": "reopened", "close": "closed",
+                         "merge": "accepted", "approved": "approved"}
+ISSUE_ACTIONS = {"open": "opened", "reopen": "reopened", "close": "closed"}
+
+def _timestamp(value=None):
+    """Normalise a hook timestamp ("2024-01-31 09:15:00 UTC" or ISO 8601) to GitLab's created_at format"""
+    if not value:
+        return activity_store.utc_now()
+    if value.endswith(" UTC"):
+        moment = datetime.strptime(value, "%Y-%m-%d %H:%M:%S UTC").replace(tzinfo=timezone.utc)
+        value = moment.isoformat()
+    return ms_to_timestamp(timestamp_to_ms(value))
+
+def _event_id(*parts):
+    """Stable negative ID so redeliveries dedupe and polled events (positive IDs) never collide"""
+    digest = hashlib.blake2b("|".join(map(str, parts)).encode(), digest_size=8).digest()
+    return -(int.from_bytes(digest, "big") >> 1) - 1
+
+def parse_webhook(event_type, payload):
+    """Turn a webhook payload into an Event like the events API would list, or None if it isn't one"""
+    if event_type in ("Push Hook", "Tag Push Hook"):
+        if payload.get("after") == ZERO_SHA:
+            action_name = "deleted"
+        elif payload.get("before") == ZERO_SHA:
+            action_name = "pushed new"
+        else:
+            action_name = "pushed to"
+        created_at = _timestamp()
+        return Event(payload["project_id"], payload["user_id"], action_name, created_at,
+                     _event_id(event_type, payload.get("ref"), payload.get("after")),
+                     commit_count=payload.get("total_commits_count") or 0)
+
+    attributes = payload.get("object_attributes") or {}
+    if event_type == "Merge Request Hook":
+        action_name = MERGE_REQUEST_ACTIONS.get(attributes.get("action"))
+        target_type = "MergeRequest"
+    elif event_type == "Issue Hook":
+        action_name = ISSUE_ACTIONS.get(attributes.get("action"))
+        target_type = "Issue"
+    elif event_type == "Note Hook":
+        action_name = "commented on"
+        # The events API reports comments by note type (Note, DiffNote, DiscussionNote)
+        target_type = attributes.get("type") or "Note"
+    else:
+        return None
+    if not action_name:
+        return None
+    created_at = _timestamp(attributes.get("updated_at") or attributes.get("created_at"))
+    author_id = payload.get("user", {}).get("id") or attributes.get("author_id")
+    return Event(payload["project"]["id"], author_id, action_name, created_at,
+                 _event_id(event_type, attributes.get("id"), action_name, created_at),
+                 target_type=target_type)
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        secret = self.server.secret
+        if secret and not hmac.compare_digest(self.headers.get("X-Gitlab-Token", ""), secret):
+            return self._send(401, {"message": "invalid token"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length))
+            event = parse_webhook(self.headers.get("X-Gitlab-Event", ""), payload)
+        except (ValueError, KeyError, TypeError) as e:
+            return self._send(400, {"message": f"unreadable payload: {e}"})
+        if event:
+            self.server.store.record([event])
+        # GitLab only needs a quick 2xx; ignored hook types are acknowledged too
+        self._send(200, {"stored": event is not None})
+
+    def _send(self, status, obj):
+        body = json.dumps(obj).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def _is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+def start_webhook_server(host=WEBHOOK_HOST, port=WEBHOOK_PORT, store=None, secret=WEBHOOK_SECRET):
+    """Receive webhooks on a background thread; returns (server, url)"""
+    if not secret and not _is_loopback(host):
+        # Anyone who can reach the port could write events into the store
+        raise ValueError(f"Refusing to receive webhooks on {host} without WEBHOOK_SECRET")
+    server = ThreadingHTTPServer((host, port), WebhookHandler)
+    server.daemon_threads = True
+    server.store = store or activity_store.get_store()
+    server.secret = secret
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://{host}:{server.server_address[1]}/"
+    print(f"🪝 Webhook receiver listening on {url}")
+    return server, url
+
+def replay(url, path, secret=WEBHOOK_SECRET):
+    """POST recorded deliveries to `url`: one {"event": "<X-Gitlab-Event>", "payload": {...}} per line"""
+    sent = 0
+    with requests.Session() as session, open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            delivery = json.loads(line)
+            headers = {"X-Gitlab-Event": delivery["event"]}
+            if secret:
+                headers["X-Gitlab-Token"] = secret
+            res = session.post(url, json=delivery["payload"], headers=headers, timeout=10)
+            res.raise_for_status()
+            sent += 1
+    return sent
+
+def main():
+    """Run the receiver in the foreground, or replay recorded deliveries against one"""
+    parser = argparse.ArgumentParser(description="Receive GitLab webhooks into the activity store")
+    parser.add_argument("--port", type=int, default=WEBHOOK_PORT)
+    parser.add_argument("--replay", metavar="FILE", help="POST the deliveries in FILE (JSON lines) and exit")
+    parser.add_argument("--url", help="receiver to replay against (default: this host and --port)")
+    args = parser.parse_args()
+
+    if args.replay:
+        url = args.url or f"http://127.0.0.1:{args.port}/"
+        print(f"🔁 Replayed {replay(url, args.replay)} deliveries to {url}")
+        return 0
+
+    server, _ = start_webhook_server(port=args.port)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())